@@ -2,6 +2,9 @@
 Gradio UI for the AI Lead Qualification Bot.
 """
 
+import time
+from pathlib import Path
+
 import gradio as gr
 
 try:
@@ -10,55 +13,24 @@ try:
 except ImportError:
     pass
 
+from config.prompts import GREETING_PROMPT
 from config.settings import app_config
-from services.bot_service import LeadBot
+from services.bot_service import get_bot
 from utils.logging import get_logger
 
 logger = get_logger(__name__)
 
+# Stylesheet lives in static/ and is read once at import
+CUSTOM_CSS = (Path(__file__).parent / "static" / "app.css").read_text(encoding="utf-8")
+
 def build_ui():
     """Builds the Gradio interface."""
-    bot = LeadBot()
-    
-    # Custom CSS for a slick look
-    custom_css = """
-    body {
-        background: linear-gradient(135deg, #1b1f3b, #3d2c8d);
-        font-family: 'Inter', sans-serif;
-    }
-    
-    .gradio-container {
-        max-width: 1200px !important;
-        padding: 20px;
-        color: white;
-    }
-    
-    #chatbox .message {
-        animation: fadeIn 0.4s ease;
-    }
-    
-    @keyframes fadeIn {
-        from { opacity: 0; transform: translateY(10px); }
-        to { opacity: 1; transform: translateY(0); }
-    }
-    
-    button {
-        background: linear-gradient(135deg, #6a11cb, #2575fc);
-        border: none !important;
-        color: white !important;
-        font-weight: bold;
-        transition: transform 0.2s ease;
-    }
-    
-    button:hover {
-        transform: scale(1.05);
-    }
-    """
+    bot = get_bot()
     
     with gr.Blocks(
         title="AI Lead Qualification Bot",
         theme=gr.themes.Soft(),
-        css=custom_css
+        css=CUSTOM_CSS
     ) as ui:
         
         gr.Markdown("""
@@ -78,6 +50,7 @@ def build_ui():
             with gr.Column(scale=2):
                 chat_display = gr.Chatbot(
                     label="Conversation",
+                    elem_id="chatbox",
                     height=500,
                     show_label=True,
                     container=True,
@@ -121,7 +94,35 @@ def build_ui():
         
         # Wire up the handlers
         def on_send(msg, session_id, history):
-            return bot.chat(msg, session_id, history)
+            # Generator handler - Gradio streams each yielded frame to the browser
+            # and diffs the chat log between frames. Frames are coalesced to one
+            # per gradio_update_interval so the client isn't re-rendering on
+            # every token, and the final frame is always sent. Session ID and
+            # sidebar rarely change mid-reply, so they get a no-op update
+            # unless their value moved.
+            last_id, last_sidebar = None, None
+            last_emit = 0.0
+            pending = None
+            
+            def frame(history, session_id, sidebar):
+                nonlocal last_id, last_sidebar
+                update = (
+                    history,
+                    session_id if session_id != last_id else gr.update(),
+                    sidebar if sidebar != last_sidebar else gr.update()
+                )
+                last_id, last_sidebar = session_id, sidebar
+                return update
+            
+            for pending in bot.stream_chat(msg, session_id, history):
+                now = time.monotonic()
+                if now - last_emit >= app_config.gradio_update_interval:
+                    last_emit = now
+                    yield frame(*pending)
+                    pending = None
+            
+            if pending is not None:
+                yield frame(*pending)
         
         def on_new_chat():
             greeting, session_id = bot.start_chat()
@@ -134,39 +135,49 @@ def build_ui():
             return bot.get_summary(session_id)
         
         # Connect events
+        # LLM calls share one bounded pool so a slow generation doesn't
+        # starve the cheap buttons, which get pools of their own.
         send_button.click(
             on_send,
             inputs=[user_input, chat_id_display, chat_display],
-            outputs=[chat_display, chat_id_display, lead_info_display]
+            outputs=[chat_display, chat_id_display, lead_info_display],
+            api_name="chat",
+            concurrency_id="llm",
+            concurrency_limit=app_config.gradio_concurrency
         )
         
         user_input.submit(
             on_send,
             inputs=[user_input, chat_id_display, chat_display],
-            outputs=[chat_display, chat_id_display, lead_info_display]
+            outputs=[chat_display, chat_id_display, lead_info_display],
+            concurrency_id="llm",
+            concurrency_limit=app_config.gradio_concurrency
         )
         
         new_chat_btn.click(
             on_new_chat,
-            outputs=[chat_display, chat_id_display, lead_info_display]
+            outputs=[chat_display, chat_id_display, lead_info_display],
+            concurrency_id="meta"
         )
         
         crm_sync_btn.click(
             on_crm_sync,
             inputs=[chat_id_display],
-            outputs=[lead_info_display]
+            outputs=[lead_info_display],
+            concurrency_id="crm",
+            concurrency_limit=app_config.gradio_crm_concurrency
         )
         
         summary_btn.click(
             on_summary,
             inputs=[chat_id_display],
-            outputs=[lead_info_display]
+            outputs=[lead_info_display],
+            concurrency_id="meta"
         )
         
-        # Auto-start with a greeting
-        greeting, initial_id = bot.start_chat()
-        chat_display.value = [[greeting, None]]
-        chat_id_display.value = initial_id
+        # Show the canned greeting up front; the session itself is created
+        # lazily on the first message (chat_id_display stays "None" until then)
+        chat_display.value = [[GREETING_PROMPT, None]]
     
     return ui
 
@@ -175,10 +186,19 @@ def run():
     try:
         ui = build_ui()
         
-        logger.info(f"Starting bot on port {app_config.gradio_port}")
+        # Only listen on all interfaces when asked to; share=True tunnels
+        # every request through gradio.live, which adds real latency
+        server_name = "0.0.0.0" if app_config.gradio_allow_public else "127.0.0.1"
+        if app_config.gradio_share:
+            logger.warning("gradio_share is on - traffic goes through the gradio.live tunnel (~200ms extra per round-trip)")
+        
+        logger.info(f"Starting bot at http://{server_name}:{app_config.gradio_port}")
         
-        ui.launch(
-            server_name="0.0.0.0",
+        ui.queue(
+            default_concurrency_limit=app_config.gradio_concurrency,
+            max_size=app_config.gradio_max_queue
+        ).launch(
+            server_name=server_name,
             server_port=app_config.gradio_port,
             share=app_config.gradio_share,
             debug=app_config.gradio_debug,
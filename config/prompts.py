@@ -2,7 +2,7 @@
 Prompt templates for the AI Lead Qualification Bot.
 """
 
-from typing import Dict, List, Any
+from typing import Dict, Any, Tuple
 
 # System prompt for the lead qualification bot
 SYSTEM_PROMPT = """You are an AI Lead Qualification Bot for a SaaS company. Your role is to:
@@ -197,6 +197,30 @@ I'm here to help with:
 
 What would you like to know more about?"""
 
+# Qualification questions in order of priority
+QUALIFICATION_QUESTIONS = (
+    "What's your role at your company?",
+    "What company do you work for?",
+    "What industry are you in?",
+    "How large is your team?",
+    "What tools are you currently using?",
+    "What's your budget range for this solution?",
+    "What's your timeline for making a decision?",
+    "What specific problems are you trying to solve?"
+)
+
+# Common product topics for the knowledge base
+PRODUCT_TOPICS = (
+    "features and capabilities",
+    "pricing and plans", 
+    "implementation and onboarding",
+    "integration options",
+    "security and compliance",
+    "customer support",
+    "case studies and success stories",
+    "competitor comparisons"
+)
+
 # Prompt templates dictionary
 PROMPT_TEMPLATES = {
     "system": SYSTEM_PROMPT,
@@ -221,28 +245,10 @@ def get_prompt(template_name: str, **kwargs) -> str:
     template = PROMPT_TEMPLATES[template_name]
     return template.format(**kwargs)
 
-def get_qualification_questions() -> List[str]:
-    """Get a list of qualification questions in order of priority."""
-    return [
-        "What's your role at your company?",
-        "What company do you work for?",
-        "What industry are you in?",
-        "How large is your team?",
-        "What tools are you currently using?",
-        "What's your budget range for this solution?",
-        "What's your timeline for making a decision?",
-        "What specific problems are you trying to solve?"
-    ]
-
-def get_product_topics() -> List[str]:
+def get_qualification_questions() -> Tuple[str, ...]:
+    """Get the qualification questions in order of priority."""
+    return QUALIFICATION_QUESTIONS
+
+def get_product_topics() -> Tuple[str, ...]:
     """Get common product topics for knowledge base."""
-    return [
-        "features and capabilities",
-        "pricing and plans", 
-        "implementation and onboarding",
-        "integration options",
-        "security and compliance",
-        "customer support",
-        "case studies and success stories",
-        "competitor comparisons"
-    ]
+    return PRODUCT_TOPICS
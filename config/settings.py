@@ -3,10 +3,11 @@ Configuration settings for the AI Lead Qualification Bot.
 """
 
 import os
-from typing import Dict, Any, List
-from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Any, Set, Tuple, FrozenSet
+from dataclasses import dataclass, field
 
-@dataclass
+@dataclass(frozen=True)
 class ModelConfig:
     """Configuration for LLM and embedding models."""
     
@@ -15,40 +16,76 @@ class ModelConfig:
     llm_max_length: int = 2048
     llm_temperature: float = 0.7
     llm_top_p: float = 0.9
+    # Weight quantization: "none", "int8" or "nf4" (4-bit); needs CUDA + bitsandbytes
+    llm_quantization: str = os.getenv("LLM_QUANTIZATION", "none").lower()
+    # Generation backend: "transformers" or "vllm" (paged KV cache, continuous batching)
+    llm_backend: str = os.getenv("LLM_BACKEND", "transformers").lower()
+    # torch.compile the model's forward pass (CUDA only; slow first start)
+    llm_compile: bool = os.getenv("LLM_COMPILE", "false").lower() == "true"
+    vllm_max_num_seqs: int = 64
+    
+    # Replies to opening messages (FEATURE_FLAGS.enable_response_cache)
+    response_cache_size: int = 1024
+    # Prefetched follow-ups: how many, and how close (cosine) a real message
+    # has to be to the guessed one
+    prefetch_follow_ups: int = 2
+    prefetch_match_threshold: float = 0.92
     
     # Embedding Configuration
     embedding_model_name: str = "sentence-transformers/all-MiniLM-L6-v2"
     embedding_dimension: int = 384
+    # "torch", or "onnx" to run the encoder under ONNX Runtime (needs
+    # sentence-transformers[onnx]); embedding_onnx_file picks the int8
+    # VNNI export the model repo ships
+    embedding_backend: str = os.getenv("EMBEDDING_BACKEND", "torch").lower()
+    embedding_onnx_file: str = "onnx/model_qint8_avx512_vnni.onnx"
+    embedding_batch_size: int = 64
+    query_embedding_cache_size: int = 1024
+    # Chunk embeddings kept in emb_cache.npz (~1.5 KB each at 384 dims)
+    embedding_cache_max_entries: int = 50000
     
     # Vector Database Configuration
     vector_db_path: str = "data/vector_store"
     chunk_size: int = 1000
     chunk_overlap: int = 200
     top_k_retrieval: int = 5
+    # Once the store holds vector_ivf_min_vectors chunks, the exact flat index
+    # is swapped for this compressed one (OPQ rotation to 64 dims, 16-byte PQ
+    # codes); nprobe = inverted lists per query
+    vector_index_factory: str = "OPQ16_64,IVF256,PQ16x8"
+    vector_ivf_min_vectors: int = 10000
+    vector_nprobe: int = 8
+    # OpenMP threads FAISS uses for search/training; 0 keeps FAISS's default
+    faiss_num_threads: int = 0
 
-@dataclass
+@dataclass(frozen=True)
 class PredictiveModelConfig:
     """Configuration for the predictive scoring model."""
     
     model_type: str = "lightgbm"
-    model_path: str = "models/trained_models/lead_scorer.pkl"
+    # LightGBM text model; labels and feature names go in a .json next to it
+    model_path: str = "models/trained_models/lead_scorer.txt"
+    # Compile the trained trees to native code with lleaves for faster scoring
+    compile_trees: bool = os.getenv("SCORER_COMPILE", "false").lower() == "true"
+    # LightGBM inference: 0 threads = LightGBM's default; early stopping skips
+    # the remaining trees once a row's class margin is clear
+    predict_num_threads: int = 0
+    predict_early_stop: bool = True
+    predict_early_stop_freq: int = 10
+    predict_early_stop_margin: float = 10.0
     
     # Feature engineering
     min_samples_for_training: int = 100
     feature_importance_threshold: float = 0.01
     
     # Scoring parameters
-    score_thresholds: Dict[str, int] = None
-    
-    def __post_init__(self):
-        if self.score_thresholds is None:
-            self.score_thresholds = {
-                "high_priority": 80,
-                "medium_priority": 60,
-                "low_priority": 40
-            }
+    score_thresholds: Dict[str, int] = field(default_factory=lambda: {
+        "high_priority": 80,
+        "medium_priority": 60,
+        "low_priority": 40
+    })
 
-@dataclass
+@dataclass(frozen=True)
 class CRMConfig:
     """Configuration for CRM integrations."""
     
@@ -60,27 +97,44 @@ class CRMConfig:
     salesforce_api_key: str = os.getenv("SALESFORCE_API_KEY", "")
     salesforce_base_url: str = "https://your-instance.salesforce.com"
     
+    # HTTP connection pooling (hosts cached, connections kept per host)
+    http_pool_hosts: int = 4
+    http_pool_size: int = 20
+    http_max_retries: int = 3
+    http_retry_backoff: float = 0.3
+    # (connect, read) seconds; without these a hung CRM blocks forever
+    http_connect_timeout: float = 3.05
+    http_read_timeout: float = 10.0
+    
+    # Circuit breaker: after this many failed calls in a row a CRM is
+    # skipped until the cooldown passes
+    circuit_fail_max: int = 5
+    circuit_reset_seconds: float = 30.0
+    
+    # Recently synced leads (by email + payload), so repeat syncs skip the network
+    lead_cache_size: int = 1024
+    lead_cache_ttl_seconds: int = 300
+    
     # Mock mode for development
     mock_mode: bool = True
 
-@dataclass
+@dataclass(frozen=True)
 class ConversationConfig:
     """Configuration for conversation management."""
     
     max_conversation_length: int = 50
     conversation_timeout_minutes: int = 30
+    max_active_conversations: int = 10000
+    max_input_length: int = 2000
     
-    # Qualification questions
-    required_fields: List[str] = None
-    
-    def __post_init__(self):
-        if self.required_fields is None:
-            self.required_fields = [
-                "role", "company", "industry", "team_size", 
-                "current_tools", "budget", "timeline", "problem"
-            ]
+    # Qualification questions: ordered for display, frozenset for "in" checks
+    required_fields_order: Tuple[str, ...] = (
+        "role", "company", "industry", "team_size", 
+        "current_tools", "budget", "timeline", "problem"
+    )
+    required_fields: FrozenSet[str] = frozenset(required_fields_order)
 
-@dataclass
+@dataclass(frozen=True)
 class LoggingConfig:
     """Configuration for logging and monitoring."""
     
@@ -89,7 +143,7 @@ class LoggingConfig:
     enable_console_logging: bool = True
     enable_file_logging: bool = True
 
-@dataclass
+@dataclass(frozen=True)
 class AppConfig:
     """Main application configuration."""
     
@@ -101,7 +155,12 @@ class AppConfig:
     # Gradio settings
     gradio_port: int = 7860
     gradio_share: bool = False
+    gradio_allow_public: bool = os.getenv("GRADIO_ALLOW_PUBLIC", "false").lower() == "true"
     gradio_debug: bool = False
+    gradio_concurrency: int = 4
+    gradio_crm_concurrency: int = 8
+    gradio_max_queue: int = 64
+    gradio_update_interval: float = 0.1  # seconds between streamed UI frames
     
     # Data paths
     data_dir: str = "data"
@@ -111,6 +170,21 @@ class AppConfig:
     # Environment
     environment: str = os.getenv("ENVIRONMENT", "development")
 
+@dataclass(frozen=True)
+class FeatureFlags:
+    """Toggles for optional bot features."""
+    
+    enable_predictive_scoring: bool = True
+    enable_crm_integration: bool = True
+    enable_vector_search: bool = True
+    enable_conversation_history: bool = True
+    enable_debug_mode: bool = False
+    # Reuse the reply to an identical opening message from another chat
+    enable_response_cache: bool = False
+    # Speculatively answer likely next messages while the user types
+    # (costs extra GPU time per turn)
+    enable_response_prefetch: bool = False
+
 # Global configuration instances
 model_config = ModelConfig()
 predictive_config = PredictiveModelConfig()
@@ -119,14 +193,8 @@ conversation_config = ConversationConfig()
 logging_config = LoggingConfig()
 app_config = AppConfig()
 
-# Feature flags
-FEATURE_FLAGS = {
-    "enable_predictive_scoring": True,
-    "enable_crm_integration": True,
-    "enable_vector_search": True,
-    "enable_conversation_history": True,
-    "enable_debug_mode": False
-}
+# Feature flags (read-only; use FEATURE_FLAGS.enable_crm_integration etc.)
+FEATURE_FLAGS = FeatureFlags()
 
 # Intent classification labels
 INTENT_LABELS = [
@@ -175,8 +243,25 @@ def get_config() -> Dict[str, Any]:
         "crm_tags": CRM_TAGS
     }
 
+# Directories already created (or found) by ensure_dir in this process
+_ensured_dirs: Set[str] = set()
+
+def ensure_dir(directory: str):
+    """
+    Make sure a directory exists. makedirs(exist_ok=True) already covers
+    the "exists" case, and paths seen before skip the syscall entirely.
+    """
+    if directory and directory not in _ensured_dirs:
+        os.makedirs(directory, exist_ok=True)
+        _ensured_dirs.add(directory)
+
+@lru_cache(maxsize=1)
 def validate_config() -> bool:
-    """Validate the configuration settings."""
+    """
+    Validate the configuration settings.
+    The config is fixed once imported, so the result is cached and repeat
+    callers don't redo the filesystem checks.
+    """
     try:
         # Check required directories exist
         required_dirs = [
@@ -186,16 +271,14 @@ def validate_config() -> bool:
         ]
         
         for directory in required_dirs:
-            if not os.path.exists(directory):
-                os.makedirs(directory, exist_ok=True)
+            ensure_dir(directory)
         
         # Validate model paths
-        if not os.path.exists(predictive_config.model_path):
-            os.makedirs(os.path.dirname(predictive_config.model_path), exist_ok=True)
+        ensure_dir(os.path.dirname(predictive_config.model_path))
         
         # Validate logging
         if logging_config.enable_file_logging:
-            os.makedirs(os.path.dirname(logging_config.log_file), exist_ok=True)
+            ensure_dir(os.path.dirname(logging_config.log_file))
         
         return True
         
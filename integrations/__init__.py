@@ -1,12 +1,20 @@
-from .manager import get_crm_client, CRMClient
-from .hubspot import HubSpotIntegration
-from .salesforce import SalesforceIntegration
-from .base import CRMIntegration
+from importlib import import_module
 
-__all__ = [
-    'get_crm_client',
-    'CRMClient',
-    'HubSpotIntegration',
-    'SalesforceIntegration',
-    'CRMIntegration'
-]
+# Submodules pull in requests/urllib3, so only load them when a name is used
+_LAZY_ATTRS = {
+    'get_crm_client': '.manager',
+    'CRMClient': '.manager',
+    'HubSpotIntegration': '.hubspot',
+    'SalesforceIntegration': '.salesforce',
+    'CRMIntegration': '.base'
+}
+
+__all__ = list(_LAZY_ATTRS)
+
+def __getattr__(name):
+    module = _LAZY_ATTRS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
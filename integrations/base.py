@@ -1,6 +1,116 @@
-from typing import Dict, Any
+import atexit
+import json
+import threading
+import time
+from typing import Dict, Any, List
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
 from config.settings import crm_config
 
+# orjson encodes straight to bytes and is several times faster than the
+# stdlib encoder requests uses for json=; fall back when it's missing.
+# Scores can come out of numpy, hence OPT_SERIALIZE_NUMPY. Responses are
+# decoded with it too, straight from the raw bytes.
+try:
+    import orjson
+    
+    def encode_json(payload: Dict[str, Any]) -> bytes:
+        return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+    
+    decode_json = orjson.loads
+    _EncodeError = orjson.JSONEncodeError
+except ImportError:
+    def encode_json(payload: Dict[str, Any]) -> bytes:
+        return json.dumps(payload).encode("utf-8")
+    
+    decode_json = json.loads
+    _EncodeError = TypeError
+
+# What a CRM call can legitimately fail with: network/HTTP errors (including
+# bad JSON in a response) and a payload we couldn't encode. Anything else
+# is a bug and should surface instead of turning into {"success": False}.
+# orjson's decode error subclasses json.JSONDecodeError.
+CRM_ERRORS = (requests.RequestException, json.JSONDecodeError, _EncodeError)
+
+def response_id(resp: requests.Response):
+    """The created record's id from a create response."""
+    return decode_json(resp.content).get("id")
+
+class _CRMRetry(Retry):
+    """
+    Retry's default allowed_methods leaves POST/PATCH out of status/read
+    retries, so a create that reached the server is never sent twice.
+    A 429 is the exception: the CRM throttled the call without doing it,
+    so any method can be resent once Retry-After has passed.
+    """
+    
+    def is_retry(self, method, status_code, has_retry_after=False):
+        if status_code == 429 and self.total:
+            return True
+        return super().is_retry(method, status_code, has_retry_after)
+
+# One HTTP session for every CRM call in the process, so connections (and
+# their TLS handshakes) get reused between requests instead of redone.
+# The pool is sized so parallel CRM syncs each keep a warm connection.
+_retry = _CRMRetry(
+    total=crm_config.http_max_retries,
+    backoff_factor=crm_config.http_retry_backoff,
+    status_forcelist=(500, 502, 503, 504),
+    respect_retry_after_header=True,
+    raise_on_status=False
+)
+_session = requests.Session()
+_adapter = HTTPAdapter(
+    pool_connections=crm_config.http_pool_hosts,
+    pool_maxsize=crm_config.http_pool_size,
+    max_retries=_retry
+)
+_session.mount("https://", _adapter)
+_session.mount("http://", _adapter)
+atexit.register(_session.close)
+
+class CircuitOpenError(requests.RequestException):
+    """Raised instead of calling a CRM that's been failing."""
+
+class _CircuitBreaker:
+    """
+    Counts consecutive failed calls to one CRM. Once there are fail_max
+    of them, calls are refused for reset_timeout seconds rather than each
+    waiting out a timeout against a CRM that's down; after that calls go
+    through again, and one more failure reopens it straight away.
+    """
+    
+    def __init__(self, fail_max: int, reset_timeout: float):
+        self.fail_max = fail_max
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._lock = threading.Lock()
+    
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            # Half-open: try again, but the next failure trips it
+            self._opened_at = None
+            self._failures = self.fail_max - 1
+            return True
+    
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+    
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.fail_max:
+                self._opened_at = time.monotonic()
+
 class CRMIntegration:
     """Base class for CRM integrations."""
     
@@ -8,11 +118,43 @@ class CRMIntegration:
         self.api_key = None
         self.base_url = None
         self.mock_mode = crm_config.mock_mode
+        self.session = _session
+        self._headers = {}
+        self._breaker = _CircuitBreaker(crm_config.circuit_fail_max, crm_config.circuit_reset_seconds)
+        self._timeout = (crm_config.http_connect_timeout, crm_config.http_read_timeout)
+    
+    def _send(self, method: str, url: str, payload: Dict[str, Any]) -> requests.Response:
+        """
+        Sends a JSON body and raises for HTTP errors. Connection errors,
+        throttling and 5xx count against the circuit breaker; other 4xx
+        are our payload's fault and don't.
+        """
+        if not self._breaker.allow():
+            raise CircuitOpenError(f"{type(self).__name__} is failing, skipping call for now")
+        
+        try:
+            resp = self.session.request(
+                method, url, headers=self._headers, data=encode_json(payload), timeout=self._timeout
+            )
+        except requests.RequestException:
+            self._breaker.record_failure()
+            raise
+        
+        if resp.status_code == 429 or resp.status_code >= 500:
+            self._breaker.record_failure()
+        else:
+            self._breaker.record_success()
+        resp.raise_for_status()
+        return resp
     
     def create_lead(self, lead_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new lead in the CRM."""
         raise NotImplementedError
     
+    def create_leads_batch(self, leads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Create several leads; CRMs with a bulk endpoint override this."""
+        return [self.create_lead(lead) for lead in leads]
+    
     def update_lead(self, lead_id: str, lead_data: Dict[str, Any]) -> Dict[str, Any]:
         """Update an existing lead in the CRM."""
         raise NotImplementedError
@@ -1,15 +1,34 @@
-import requests
-from typing import Dict, Any
-from datetime import datetime
+import itertools
+import time
+from typing import Dict, Any, List
 from config.settings import crm_config
 from utils.logging import get_logger
-from .base import CRMIntegration
+from .base import CRM_ERRORS, CRMIntegration, response_id
 
 logger = get_logger(__name__)
 
+# Cheap unique ids for mock mode
+_mock_ids = itertools.count(1)
+
+def _email_key(fields: Dict[str, Any]) -> str:
+    """Email as HubSpot stores it (trimmed, lowercased), to match batch results to inputs."""
+    return (fields.get("email") or "").strip().lower()
+
 class HubSpotIntegration(CRMIntegration):
     """Talks to HubSpot's API to manage contacts."""
     
+    # Properties every new contact gets
+    _CONTACT_DEFAULTS = {"lifecyclestage": "lead", "lead_status": "NEW"}
+    # HubSpot property -> lead_info key
+    _CONTACT_FIELDS = (
+        ("email", "email"),
+        ("company", "company"),
+        ("jobtitle", "role"),
+        ("industry", "industry")
+    )
+    # HubSpot's batch endpoints take at most 100 inputs per call
+    _BATCH_LIMIT = 100
+    
     def __init__(self):
         super().__init__()
         self.api_key = crm_config.hubspot_api_key
@@ -19,6 +38,15 @@ class HubSpotIntegration(CRMIntegration):
         if not self.api_key and not self.mock_mode:
             logger.warning("No HubSpot key found, running in mock mode")
             self.mock_mode = True
+        
+        # base_url and api_key don't change after this, so build these once
+        self._contacts_url = f"{self.base_url}/crm/v3/objects/contacts"
+        self._notes_url = f"{self.base_url}/crm/v3/objects/notes"
+        self._batch_create_url = f"{self._contacts_url}/batch/create"
+        self._headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
     
     def create_lead(self, lead_info: Dict[str, Any]) -> Dict[str, Any]:
         """Creates a new contact in HubSpot."""
@@ -26,35 +54,12 @@ class HubSpotIntegration(CRMIntegration):
             return self._mock_create(lead_info)
         
         try:
-            endpoint = f"{self.base_url}/crm/v3/objects/contacts"
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
-            
-            # HubSpot wants firstname/lastname split
-            name_parts = (lead_info.get("name") or "").split(maxsplit=1)
-            first = name_parts[0] if name_parts else ""
-            last = name_parts[1] if len(name_parts) > 1 else ""
-            
-            payload = {
-                "properties": {
-                    "email": lead_info.get("email"),
-                    "firstname": first,
-                    "lastname": last,
-                    "company": lead_info.get("company"),
-                    "jobtitle": lead_info.get("role"),
-                    "industry": lead_info.get("industry"),
-                    "lifecyclestage": "lead",
-                    "lead_status": "NEW"
-                }
-            }
+            payload = {"properties": self._contact_properties(lead_info)}
             
-            resp = requests.post(endpoint, headers=headers, json=payload)
-            resp.raise_for_status()
+            resp = self._send("post", self._contacts_url, payload)
             
-            contact_id = resp.json().get('id')
-            logger.info(f"Created HubSpot contact: {contact_id}")
+            contact_id = response_id(resp)
+            logger.info("Created HubSpot contact: {}", contact_id)
             
             return {
                 "success": True,
@@ -63,7 +68,7 @@ class HubSpotIntegration(CRMIntegration):
                 "message": "Contact created"
             }
             
-        except Exception as e:
+        except CRM_ERRORS as e:
             logger.error(f"HubSpot create failed: {e}")
             return {
                 "success": False,
@@ -71,18 +76,71 @@ class HubSpotIntegration(CRMIntegration):
                 "message": "Failed to create contact"
             }
     
+    def create_leads_batch(self, leads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Creates contacts through HubSpot's batch endpoint, 100 per request.
+        Returns one result per input, in input order. HubSpot doesn't keep
+        that order and leaves rejected inputs out of "results", so created
+        records are matched back to the inputs by email.
+        """
+        if self.mock_mode:
+            return [self._mock_create(lead) for lead in leads]
+        
+        results = []
+        for start in range(0, len(leads), self._BATCH_LIMIT):
+            chunk = leads[start:start + self._BATCH_LIMIT]
+            payload = {"inputs": [{"properties": self._contact_properties(lead)} for lead in chunk]}
+            
+            try:
+                resp = self._send("post", self._batch_create_url, payload)
+                
+                body = resp.json()
+                created = body.get("results", [])
+                logger.info("Created {} of {} HubSpot contacts in one batch", len(created), len(chunk))
+                
+                # On a partial success (207) the rejected inputs only show up
+                # in "errors", which don't say which input they belong to
+                by_email = {}
+                for record in created:
+                    by_email.setdefault(_email_key(record.get("properties", {})), []).append(record)
+                error = "; ".join(err.get("message", "") for err in body.get("errors", [])) or "Contact not created"
+                
+                for lead in chunk:
+                    matches = by_email.get(_email_key(lead))
+                    if matches:
+                        record = matches.pop(0)
+                        results.append({
+                            "success": True,
+                            "lead_id": record.get("id"),
+                            "hubspot_id": record.get("id"),
+                            "email": lead.get("email"),
+                            "message": "Contact created"
+                        })
+                    else:
+                        results.append({
+                            "success": False,
+                            "error": error,
+                            "email": lead.get("email"),
+                            "message": "Failed to create contact"
+                        })
+                
+            except CRM_ERRORS as e:
+                logger.error(f"HubSpot batch create failed: {e}")
+                results.extend({
+                    "success": False,
+                    "error": str(e),
+                    "email": lead.get("email"),
+                    "message": "Failed to create contact"
+                } for lead in chunk)
+        
+        return results
+    
     def update_lead(self, lead_id: str, updates: Dict[str, Any]) -> Dict[str, Any]:
         """Updates an existing HubSpot contact."""
         if self.mock_mode:
             return self._mock_update(lead_id, updates)
         
         try:
-            endpoint = f"{self.base_url}/crm/v3/objects/contacts/{lead_id}"
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
-            
             props = {}
             if updates.get("intent"):
                 props["lead_status"] = updates["intent"].upper()
@@ -91,10 +149,9 @@ class HubSpotIntegration(CRMIntegration):
             if updates.get("company"):
                 props["company"] = updates["company"]
             
-            resp = requests.patch(endpoint, headers=headers, json={"properties": props})
-            resp.raise_for_status()
+            self._send("patch", f"{self._contacts_url}/{lead_id}", {"properties": props})
             
-            logger.info(f"Updated HubSpot contact: {lead_id}")
+            logger.info("Updated HubSpot contact: {}", lead_id)
             
             return {
                 "success": True,
@@ -102,7 +159,7 @@ class HubSpotIntegration(CRMIntegration):
                 "message": "Contact updated"
             }
             
-        except Exception as e:
+        except CRM_ERRORS as e:
             logger.error(f"HubSpot update failed: {e}")
             return {
                 "success": False,
@@ -116,16 +173,11 @@ class HubSpotIntegration(CRMIntegration):
             return self._mock_note(lead_id, note_text)
         
         try:
-            endpoint = f"{self.base_url}/crm/v3/objects/notes"
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
-            
             payload = {
                 "properties": {
                     "hs_note_body": note_text,
-                    "hs_timestamp": datetime.now().isoformat()
+                    # Epoch millis: no datetime object, and no timezone guesswork
+                    "hs_timestamp": time.time_ns() // 1_000_000
                 },
                 "associations": [{
                     "to": {"id": lead_id},
@@ -136,11 +188,10 @@ class HubSpotIntegration(CRMIntegration):
                 }]
             }
             
-            resp = requests.post(endpoint, headers=headers, json=payload)
-            resp.raise_for_status()
+            resp = self._send("post", self._notes_url, payload)
             
-            note_id = resp.json().get("id")
-            logger.info(f"Added note to HubSpot contact {lead_id}")
+            note_id = response_id(resp)
+            logger.info("Added note to HubSpot contact {}", lead_id)
             
             return {
                 "success": True,
@@ -148,7 +199,7 @@ class HubSpotIntegration(CRMIntegration):
                 "message": "Note added"
             }
             
-        except Exception as e:
+        except CRM_ERRORS as e:
             logger.error(f"HubSpot note failed: {e}")
             return {
                 "success": False,
@@ -156,10 +207,23 @@ class HubSpotIntegration(CRMIntegration):
                 "message": "Note creation failed"
             }
     
+    def _contact_properties(self, lead_info: Dict[str, Any]) -> Dict[str, Any]:
+        """Builds the HubSpot property dict for a new contact."""
+        # HubSpot wants firstname/lastname split
+        first, _, last = (lead_info.get("name") or "").strip().partition(" ")
+        last = last.lstrip()
+        
+        # Only send what we actually know; blanks just bloat the body
+        props = {"firstname": first, "lastname": last}
+        props.update((prop, lead_info.get(key)) for prop, key in self._CONTACT_FIELDS)
+        props = {k: v for k, v in props.items() if v}
+        props.update(self._CONTACT_DEFAULTS)
+        return props
+    
     def _mock_create(self, lead_info: Dict[str, Any]) -> Dict[str, Any]:
         """Fake contact creation for testing."""
-        fake_id = f"mock_hs_{datetime.now().timestamp()}"
-        logger.info(f"Mock: Created HubSpot contact {fake_id}")
+        fake_id = f"mock_hs_{next(_mock_ids)}"
+        logger.info("Mock: Created HubSpot contact {}", fake_id)
         
         return {
             "success": True,
@@ -170,7 +234,7 @@ class HubSpotIntegration(CRMIntegration):
     
     def _mock_update(self, lead_id: str, updates: Dict[str, Any]) -> Dict[str, Any]:
         """Fake update for testing."""
-        logger.info(f"Mock: Updated HubSpot contact {lead_id}")
+        logger.info("Mock: Updated HubSpot contact {}", lead_id)
         
         return {
             "success": True,
@@ -180,8 +244,8 @@ class HubSpotIntegration(CRMIntegration):
     
     def _mock_note(self, lead_id: str, note_text: str) -> Dict[str, Any]:
         """Fake note for testing."""
-        fake_note_id = f"mock_note_{datetime.now().timestamp()}"
-        logger.info(f"Mock: Added note to {lead_id}")
+        fake_note_id = f"mock_hs_note_{next(_mock_ids)}"
+        logger.info("Mock: Added note to {}", lead_id)
         
         return {
             "success": True,
@@ -1,4 +1,10 @@
+import hashlib
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any
+from cachetools import TTLCache
+from config.settings import crm_config
 from .hubspot import HubSpotIntegration
 from .salesforce import SalesforceIntegration
 
@@ -11,54 +17,78 @@ class CRMClient:
     def __init__(self):
         self.hubspot = HubSpotIntegration()
         self.salesforce = SalesforceIntegration()
+        # Keys and mock mode are settled once the integrations are built
+        self._active = [
+            (name, client)
+            for name, client in (("hubspot", self.hubspot), ("salesforce", self.salesforce))
+            if client.api_key or client.mock_mode
+        ]
+        # CRM calls are pure network wait, so hit the platforms in parallel
+        self._pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="crm")
+        # (email, payload hash) -> last successful sync result; TTLCache
+        # isn't thread-safe
+        self._lead_cache = TTLCache(maxsize=crm_config.lead_cache_size, ttl=crm_config.lead_cache_ttl_seconds)
+        self._lead_cache_lock = threading.Lock()
+    
+    def _fan_out(self, method: str, *args) -> Dict[str, Any]:
+        """
+        Calls the same method on every active CRM in parallel.
+        Total wait is the slowest CRM, not the sum of them.
+        """
+        pending = {
+            name: self._pool.submit(getattr(client, method), *args)
+            for name, client in self._active
+        }
+        return {name: future.result() for name, future in pending.items()}
     
     def sync_leads(self, lead_info: Dict[str, Any]) -> Dict[str, Any]:
         """
         Pushes lead data to all active CRMs.
         Returns a dict with results from each platform.
         """
-        outcomes = {}
+        # The same person often gets synced more than once per session with
+        # nothing new; the CRMs would just reject the duplicate after a
+        # round trip. Any change to the payload (score, intent, tags) is a
+        # different key, so it goes out instead of getting the old result.
+        email = (lead_info.get("email") or "").strip().lower()
+        key = (email, _payload_digest(lead_info)) if email else None
+        if key:
+            with self._lead_cache_lock:
+                cached = self._lead_cache.get(key)
+            if cached is not None:
+                return cached
         
-        # Try HubSpot if configured
-        if self.hubspot.api_key or self.hubspot.mock_mode:
-            outcomes["hubspot"] = self.hubspot.create_lead(lead_info)
+        results = self._fan_out("create_lead", lead_info)
         
-        # Try Salesforce if configured
-        if self.salesforce.api_key or self.salesforce.mock_mode:
-            outcomes["salesforce"] = self.salesforce.create_lead(lead_info)
-        
-        return outcomes
+        # Only remember full successes so failed syncs can be retried
+        if key and all(r.get("success") for r in results.values()):
+            with self._lead_cache_lock:
+                self._lead_cache[key] = results
+        return results
     
     def update_lead_everywhere(self, lead_id: str, updates: Dict[str, Any]) -> Dict[str, Any]:
         """Updates an existing lead across all CRMs."""
-        outcomes = {}
-        
-        if self.hubspot.api_key or self.hubspot.mock_mode:
-            outcomes["hubspot"] = self.hubspot.update_lead(lead_id, updates)
-        
-        if self.salesforce.api_key or self.salesforce.mock_mode:
-            outcomes["salesforce"] = self.salesforce.update_lead(lead_id, updates)
-        
-        return outcomes
+        return self._fan_out("update_lead", lead_id, updates)
     
     def add_notes_everywhere(self, lead_id: str, note_text: str) -> Dict[str, Any]:
         """Adds a note to the lead in all CRMs."""
-        outcomes = {}
-        
-        if self.hubspot.api_key or self.hubspot.mock_mode:
-            outcomes["hubspot"] = self.hubspot.add_note(lead_id, note_text)
-        
-        if self.salesforce.api_key or self.salesforce.mock_mode:
-            outcomes["salesforce"] = self.salesforce.add_note(lead_id, note_text)
-        
-        return outcomes
+        return self._fan_out("add_note", lead_id, note_text)
+
+def _payload_digest(lead_info: Dict[str, Any]) -> str:
+    """Stable hash of a lead payload, independent of key order."""
+    blob = json.dumps(lead_info, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.blake2b(blob, digest_size=16).hexdigest()
 
 # Singleton pattern - one client for the whole app
 _client_instance = None
+_client_lock = threading.Lock()
 
 def get_crm_client() -> CRMClient:
     """Gets the shared CRM client instance."""
     global _client_instance
     if _client_instance is None:
-        _client_instance = CRMClient()
+        # Gradio handlers can race here on first use; only build one client
+        with _client_lock:
+            if _client_instance is None:
+                _client_instance = CRMClient()
     return _client_instance
@@ -1,15 +1,29 @@
-import requests
-from typing import Dict, Any
-from datetime import datetime
+import itertools
+from typing import Dict, Any, List
 from config.settings import crm_config
 from utils.logging import get_logger
-from .base import CRMIntegration
+from .base import CRM_ERRORS, CRMIntegration, response_id
 
 logger = get_logger(__name__)
 
+# Cheap unique ids for mock mode
+_mock_ids = itertools.count(1)
+
 class SalesforceIntegration(CRMIntegration):
     """Handles Salesforce API calls for lead management."""
     
+    # Fields every new lead gets
+    _LEAD_DEFAULTS = {"LeadSource": "AI Bot", "Status": "New"}
+    # Salesforce field -> lead_info key
+    _LEAD_FIELDS = (
+        ("Email", "email"),
+        ("Company", "company"),
+        ("Title", "role"),
+        ("Industry", "industry")
+    )
+    # The sObject Collections API takes at most 200 records per call
+    _BATCH_LIMIT = 200
+    
     def __init__(self):
         super().__init__()
         self.api_key = crm_config.salesforce_api_key
@@ -18,6 +32,15 @@ class SalesforceIntegration(CRMIntegration):
         if not self.api_key and not self.mock_mode:
             logger.warning("No Salesforce credentials, using mock mode")
             self.mock_mode = True
+        
+        # base_url and api_key don't change after this, so build these once
+        self._lead_base = f"{self.base_url}/services/data/v58.0/sobjects/Lead"
+        self._note_url = f"{self.base_url}/services/data/v58.0/sobjects/Note"
+        self._composite_url = f"{self.base_url}/services/data/v58.0/composite/sobjects"
+        self._headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
     
     def create_lead(self, lead_info: Dict[str, Any]) -> Dict[str, Any]:
         """Creates a new Lead object in Salesforce."""
@@ -25,33 +48,12 @@ class SalesforceIntegration(CRMIntegration):
             return self._mock_create(lead_info)
         
         try:
-            endpoint = f"{self.base_url}/services/data/v58.0/sobjects/Lead"
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
+            payload = self._lead_record(lead_info)
             
-            # Salesforce requires LastName, so we split or default
-            name_parts = (lead_info.get("name") or "").split(maxsplit=1)
-            first = name_parts[0] if name_parts else ""
-            last = name_parts[1] if len(name_parts) > 1 else "Unknown"
+            resp = self._send("post", self._lead_base, payload)
             
-            payload = {
-                "FirstName": first,
-                "LastName": last,
-                "Email": lead_info.get("email"),
-                "Company": lead_info.get("company"),
-                "Title": lead_info.get("role"),
-                "Industry": lead_info.get("industry"),
-                "LeadSource": "AI Bot",
-                "Status": "New"
-            }
-            
-            resp = requests.post(endpoint, headers=headers, json=payload)
-            resp.raise_for_status()
-            
-            sf_id = resp.json().get('id')
-            logger.info(f"Created Salesforce lead: {sf_id}")
+            sf_id = response_id(resp)
+            logger.info("Created Salesforce lead: {}", sf_id)
             
             return {
                 "success": True,
@@ -60,7 +62,7 @@ class SalesforceIntegration(CRMIntegration):
                 "message": "Lead created"
             }
             
-        except Exception as e:
+        except CRM_ERRORS as e:
             logger.error(f"Salesforce create error: {e}")
             return {
                 "success": False,
@@ -68,18 +70,60 @@ class SalesforceIntegration(CRMIntegration):
                 "message": "Lead creation failed"
             }
     
+    def create_leads_batch(self, leads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Creates leads through the sObject Collections API, 200 per request.
+        Results come back in the same order as the input.
+        """
+        if self.mock_mode:
+            return [self._mock_create(lead) for lead in leads]
+        
+        results = []
+        for start in range(0, len(leads), self._BATCH_LIMIT):
+            chunk = leads[start:start + self._BATCH_LIMIT]
+            payload = {
+                # Let the good records through even if some are rejected
+                "allOrNone": False,
+                "records": [{"attributes": {"type": "Lead"}, **self._lead_record(lead)} for lead in chunk]
+            }
+            
+            try:
+                resp = self._send("post", self._composite_url, payload)
+                
+                created = resp.json()
+                logger.info("Sent {} Salesforce leads in one batch", len(chunk))
+                
+                for record in created:
+                    if record.get("success"):
+                        results.append({
+                            "success": True,
+                            "lead_id": record.get("id"),
+                            "salesforce_id": record.get("id"),
+                            "message": "Lead created"
+                        })
+                    else:
+                        results.append({
+                            "success": False,
+                            "error": str(record.get("errors")),
+                            "message": "Lead creation failed"
+                        })
+                
+            except CRM_ERRORS as e:
+                logger.error(f"Salesforce batch create error: {e}")
+                results.extend({
+                    "success": False,
+                    "error": str(e),
+                    "message": "Lead creation failed"
+                } for _ in chunk)
+        
+        return results
+    
     def update_lead(self, lead_id: str, updates: Dict[str, Any]) -> Dict[str, Any]:
         """Updates an existing Salesforce lead."""
         if self.mock_mode:
             return self._mock_update(lead_id, updates)
         
         try:
-            endpoint = f"{self.base_url}/services/data/v58.0/sobjects/Lead/{lead_id}"
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
-            
             payload = {}
             if updates.get("intent"):
                 payload["Status"] = updates["intent"].upper()
@@ -89,10 +133,9 @@ class SalesforceIntegration(CRMIntegration):
             if updates.get("company"):
                 payload["Company"] = updates["company"]
             
-            resp = requests.patch(endpoint, headers=headers, json=payload)
-            resp.raise_for_status()
+            self._send("patch", f"{self._lead_base}/{lead_id}", payload)
             
-            logger.info(f"Updated Salesforce lead: {lead_id}")
+            logger.info("Updated Salesforce lead: {}", lead_id)
             
             return {
                 "success": True,
@@ -100,7 +143,7 @@ class SalesforceIntegration(CRMIntegration):
                 "message": "Lead updated"
             }
             
-        except Exception as e:
+        except CRM_ERRORS as e:
             logger.error(f"Salesforce update error: {e}")
             return {
                 "success": False,
@@ -114,23 +157,16 @@ class SalesforceIntegration(CRMIntegration):
             return self._mock_note(lead_id, note_text)
         
         try:
-            endpoint = f"{self.base_url}/services/data/v58.0/sobjects/Note"
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
-            
             payload = {
                 "Title": "AI Bot Note",
                 "Body": note_text,
                 "ParentId": lead_id
             }
             
-            resp = requests.post(endpoint, headers=headers, json=payload)
-            resp.raise_for_status()
+            resp = self._send("post", self._note_url, payload)
             
-            note_id = resp.json().get("id")
-            logger.info(f"Added note to Salesforce lead {lead_id}")
+            note_id = response_id(resp)
+            logger.info("Added note to Salesforce lead {}", lead_id)
             
             return {
                 "success": True,
@@ -138,7 +174,7 @@ class SalesforceIntegration(CRMIntegration):
                 "message": "Note created"
             }
             
-        except Exception as e:
+        except CRM_ERRORS as e:
             logger.error(f"Salesforce note error: {e}")
             return {
                 "success": False,
@@ -146,10 +182,23 @@ class SalesforceIntegration(CRMIntegration):
                 "message": "Note creation failed"
             }
     
+    def _lead_record(self, lead_info: Dict[str, Any]) -> Dict[str, Any]:
+        """Builds the Salesforce field dict for a new Lead."""
+        # Salesforce requires LastName, so we split or default
+        first, _, last = (lead_info.get("name") or "").strip().partition(" ")
+        last = last.lstrip() or "Unknown"
+        
+        # Only send what we actually know; blanks just bloat the body
+        record = {"FirstName": first, "LastName": last}
+        record.update((field, lead_info.get(key)) for field, key in self._LEAD_FIELDS)
+        record = {k: v for k, v in record.items() if v}
+        record.update(self._LEAD_DEFAULTS)
+        return record
+    
     def _mock_create(self, lead_info: Dict[str, Any]) -> Dict[str, Any]:
         """Mock lead creation for dev/test."""
-        fake_id = f"mock_sf_{datetime.now().timestamp()}"
-        logger.info(f"Mock: Created SF lead {fake_id}")
+        fake_id = f"mock_sf_{next(_mock_ids)}"
+        logger.info("Mock: Created SF lead {}", fake_id)
         
         return {
             "success": True,
@@ -160,7 +209,7 @@ class SalesforceIntegration(CRMIntegration):
     
     def _mock_update(self, lead_id: str, updates: Dict[str, Any]) -> Dict[str, Any]:
         """Mock update for dev/test."""
-        logger.info(f"Mock: Updated SF lead {lead_id}")
+        logger.info("Mock: Updated SF lead {}", lead_id)
         
         return {
             "success": True,
@@ -170,8 +219,8 @@ class SalesforceIntegration(CRMIntegration):
     
     def _mock_note(self, lead_id: str, note_text: str) -> Dict[str, Any]:
         """Mock note for dev/test."""
-        fake_note_id = f"mock_note_{datetime.now().timestamp()}"
-        logger.info(f"Mock: Added note to SF lead {lead_id}")
+        fake_note_id = f"mock_sf_note_{next(_mock_ids)}"
+        logger.info("Mock: Added note to SF lead {}", lead_id)
         
         return {
             "success": True,
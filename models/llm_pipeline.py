@@ -2,34 +2,173 @@
 LLM pipeline for conversational lead qualification with RAG and structured output.
 """
 
+import asyncio
+import copy
 import json
+import queue
 import re
-from typing import Dict, List, Any, Optional, Tuple
-from dataclasses import dataclass
+import time
+import uuid
+from bisect import bisect_right
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing, nullcontext
+from threading import Event, Lock, Thread
+from typing import Deque, Dict, List, Any, NamedTuple, Optional, Tuple, Iterator
+from dataclasses import dataclass, replace
 
-from transformers import AutoTokenizer, AutoModelForCausalLM, pipeline
+import numpy as np
+import torch
+from transformers import (
+    AutoTokenizer, AutoModelForCausalLM, BitsAndBytesConfig, StoppingCriteria,
+    StoppingCriteriaList, TextIteratorStreamer, pipeline
+)
 from langchain_community.llms import HuggingFacePipeline
 from langchain.schema import HumanMessage, SystemMessage
 
-from config.settings import model_config
+from config.settings import FEATURE_FLAGS, conversation_config, model_config
 from config.prompts import get_prompt, PROMPT_TEMPLATES
 from models.vector_store import get_vector_store
+from models.response_cache import ResponseCache
 from models.predictive_model import get_predictive_model
 from utils.logging import get_logger
 
+# Reusable KV caches arrived in transformers 4.36
+try:
+    from transformers import DynamicCache
+except ImportError:
+    DynamicCache = None
+
+# vLLM is optional; only needed when model_config.llm_backend == "vllm"
+try:
+    from vllm import AsyncEngineArgs, AsyncLLMEngine, SamplingParams
+except ImportError:
+    AsyncLLMEngine = None
+
 logger = get_logger(__name__)
 
+# Lead-info extraction patterns, compiled once. Each is a single alternation
+# so a message is scanned once per field rather than once per phrasing.
+_COMPANY_RE = re.compile(r"(?:at|from|work for|company) (\w+)")
+_ROLE_RE = re.compile(r"(\w+ (?:manager|director|lead|engineer|analyst))")
+_TEAM_SIZE_RE = re.compile(r"(\d+) (?:person|people|employees)|team of (\d+)")
+
+def _extract_lead_fields(message: str) -> Dict[str, Any]:
+    """Lead details (company, role, team size) mentioned in one message."""
+    # Simple extraction - in production, you'd use NER or more sophisticated extraction
+    message_lower = message.lower()
+    fields = {}
+    
+    # Extract company name (simple pattern matching)
+    match = _COMPANY_RE.search(message_lower)
+    if match:
+        fields['company'] = match.group(1).title()
+    
+    # Extract role
+    match = _ROLE_RE.search(message_lower)
+    if match:
+        fields['role'] = match.group(1)
+    
+    # Extract team size
+    match = _TEAM_SIZE_RE.search(message_lower)
+    if match:
+        fields['team_size'] = int(match.group(1) or match.group(2))
+    
+    return fields
+
+# Score cutoffs for the priority tags: <60 low, 60-79 medium, 80+ high
+_PRIORITY_CUTOFFS = (60, 80)
+_PRIORITY_TAGS = ('low_priority', 'medium_priority', 'high_priority')
+
+# Keyword in the prediction signals -> CRM tag
+_MIGRATION_TAGS = (
+    ('salesforce', 'salesforce_migration'),
+    ('hubspot', 'hubspot_migration')
+)
+
+# Likely next user messages, keyed by the lead field the bot is still
+# missing (None = nothing missing), used to prefetch replies
+_FOLLOW_UP_GUESSES = (
+    ('role', "I'm the sales manager"),
+    ('company', "I work at a software company"),
+    ('team_size', "We have a team of about 50 people"),
+    (None, "Can I get a demo?"),
+    (None, "What does pricing look like?")
+)
+
+# Number of most recent messages quoted back to the model in each prompt
+_HISTORY_MESSAGES = 5
+
+# Per-turn prompt layout, filled in with a single str.format call
+_USER_PROMPT_TEMPLATE = """
+Conversation History:
+{history}
+
+Available Product Knowledge:
+{product_knowledge}
+
+Case Studies:
+{case_studies}
+
+Competitor Information:
+{competitor_info}
+
+User Message: {user_message}
+
+Please respond naturally while gathering qualification information and providing helpful product information.
+"""
+
+class Message(NamedTuple):
+    """One chat turn. A tuple instead of a dict keeps long histories small."""
+    
+    role: str
+    content: str
+    timestamp: int
+
+class PrefetchedReply(NamedTuple):
+    """A reply generated ahead of time for a guessed next message."""
+    
+    # Normalized guess text and the lead fields it mentions
+    guess: str
+    lead_fields: Dict[str, Any]
+    embedding: np.ndarray
+    reply: str
+
 @dataclass
 class ConversationState:
     """State management for ongoing conversations."""
     
+    # No per-instance __dict__. Slots can't coexist with class-level field
+    # defaults (and dataclass(slots=True) needs 3.10), so every field is
+    # passed in by start_conversation.
+    __slots__ = (
+        'conversation_id', 'messages', 'lead_info', 'behavioral_data',
+        'collected_fields', 'current_intent', 'current_score', 'prefetched',
+        'history_lines', 'history_tail'
+    )
+    
     conversation_id: str
-    messages: List[Dict[str, Any]]
+    messages: Deque[Message]
     lead_info: Dict[str, Any]
     behavioral_data: Dict[str, Any]
     collected_fields: List[str]
-    current_intent: str = "researching"
-    current_score: int = 50
+    current_intent: str
+    current_score: int
+    # Replies generated ahead of time for the next turn
+    prefetched: List[PrefetchedReply]
+    # Rendered "Role: text" lines for the last few messages, and their join,
+    # kept up to date as messages come in so prompts don't re-render them
+    history_lines: Deque[str]
+    history_tail: str
+
+class _StopOnEvent(StoppingCriteria):
+    """Stopping criterion that fires once the given event is set."""
+    
+    def __init__(self, event: Event):
+        self.event = event
+    
+    def __call__(self, input_ids, scores, **kwargs) -> bool:
+        return self.event.is_set()
 
 class LLMPipeline:
     """Main LLM pipeline for lead qualification."""
@@ -40,18 +179,39 @@ class LLMPipeline:
         self.model = None
         self.pipeline = None
         self.llm = None
+        self.vllm_engine = None
+        self._system_prefix = None
+        # Held around model.generate(); a real lock only once the static KV
+        # cache is on (see _compile_model)
+        self._generate_guard = nullcontext()
+        
+        # These prompts take no arguments, so render them once per process
+        self._system_prompt = get_prompt("system")
+        self._greeting = get_prompt("greeting")
         
         # Initialize components
         self.vector_store = get_vector_store()
         self.predictive_model = get_predictive_model()
+        self.response_cache = None
+        if FEATURE_FLAGS.enable_response_cache:
+            self.response_cache = ResponseCache(capacity=model_config.response_cache_size)
+        # One worker, so speculative generation never crowds out real traffic
+        self._prefetch_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="prefetch")
         
-        # Conversation states
-        self.conversations: Dict[str, ConversationState] = {}
+        # Conversation states, least recently used first. Abandoned chats
+        # are never ended explicitly, so the oldest get evicted at the cap.
+        self.conversations: "OrderedDict[str, ConversationState]" = OrderedDict()
         
         self._initialize_llm()
     
     def _initialize_llm(self):
         """Initialize the LLM model and pipeline."""
+        if model_config.llm_backend == "vllm":
+            if AsyncLLMEngine is None:
+                logger.warning("LLM_BACKEND=vllm but vllm isn't installed, using transformers")
+            elif self._initialize_vllm():
+                return
+        
         try:
             logger.info(f"Loading LLM model: {model_config.llm_model_name}")
             
@@ -61,9 +221,13 @@ class LLMPipeline:
                 model_config.llm_model_name,
                 torch_dtype="auto",
                 device_map="auto",
-                trust_remote_code=True
+                trust_remote_code=True,
+                quantization_config=self._quantization_config()
             )
             
+            if model_config.llm_compile:
+                self._compile_model()
+            
             # Create pipeline
             self.pipeline = pipeline(
                 "text-generation",
@@ -79,6 +243,11 @@ class LLMPipeline:
             # Create LangChain LLM wrapper
             self.llm = HuggingFacePipeline(pipeline=self.pipeline)
             
+            # A prebuilt dynamic prefix cache can't be combined with the static
+            # cache the compiled model decodes with
+            if self.model.generation_config.cache_implementation != "static":
+                self._system_prefix = self._build_system_prefix()
+            
             logger.info("LLM pipeline initialized successfully")
             
         except Exception as e:
@@ -86,6 +255,160 @@ class LLMPipeline:
             # Fallback to a simpler approach
             self._initialize_fallback()
     
+    def _initialize_vllm(self) -> bool:
+        """
+        Load the model into vLLM's async engine instead of transformers. Its
+        paged KV cache and continuous batching make much better use of the
+        GPU, and prefix caching lets every prompt share the system prompt's
+        KV blocks.
+        """
+        try:
+            logger.info(f"Loading LLM model with vLLM: {model_config.llm_model_name}")
+            # Request handlers are plain threads; the engine runs its
+            # scheduler on an event loop of its own
+            self._vllm_loop = asyncio.new_event_loop()
+            Thread(target=self._vllm_loop.run_forever, daemon=True, name="vllm").start()
+            self.vllm_engine = AsyncLLMEngine.from_engine_args(AsyncEngineArgs(
+                model=model_config.llm_model_name,
+                max_model_len=model_config.llm_max_length,
+                max_num_seqs=model_config.vllm_max_num_seqs,
+                enable_prefix_caching=True,
+                trust_remote_code=True
+            ))
+            # max_tokens=None lets a reply run to max_model_len, the same
+            # prompt + reply budget max_length gives the transformers path
+            self._sampling_params = SamplingParams(
+                temperature=model_config.llm_temperature,
+                top_p=model_config.llm_top_p,
+                max_tokens=None
+            )
+            logger.info("vLLM engine initialized successfully")
+            return True
+        except Exception as e:
+            logger.error(f"Error initializing vLLM, using transformers: {e}")
+            self.vllm_engine = None
+            self._vllm_loop.call_soon_threadsafe(self._vllm_loop.stop)
+            return False
+    
+    def _vllm_stream(self, prompt: str) -> Iterator[str]:
+        """
+        Yields a reply's new text as vLLM decodes it. Every call is its own
+        engine request, so concurrent users share decode steps instead of
+        waiting for each other. Closing the iterator aborts the request.
+        """
+        chunks = queue.Queue()
+        
+        async def consume():
+            try:
+                async for output in self.vllm_engine.generate(prompt, self._sampling_params, uuid.uuid4().hex):
+                    chunks.put(output.outputs[0].text)
+            except Exception as e:
+                chunks.put(e)
+            finally:
+                chunks.put(None)
+        
+        future = asyncio.run_coroutine_threadsafe(consume(), self._vllm_loop)
+        sent = 0
+        try:
+            # Outputs carry the whole text so far; pass on only what's new
+            while True:
+                text = chunks.get()
+                if text is None:
+                    break
+                if isinstance(text, Exception):
+                    raise text
+                if len(text) > sent:
+                    yield text[sent:]
+                    sent = len(text)
+        finally:
+            # Cancelling the task makes vLLM abort the request
+            future.cancel()
+    
+    def _build_system_prefix(self) -> Optional[Tuple[str, torch.Tensor, Any]]:
+        """
+        Runs the fixed system prompt through the model once and keeps its
+        token ids and KV cache, so streamed replies only prefill the part of
+        the prompt that changes. Returns (prompt_text, input_ids, kv_cache),
+        or None if this transformers/model combination can't do it.
+        """
+        if DynamicCache is None:
+            return None
+        try:
+            prefix_text = f"{self._system_prompt}\n\n"
+            input_ids = self.tokenizer(prefix_text, return_tensors="pt").input_ids.to(self.model.device)
+            cache = DynamicCache()
+            with torch.no_grad():
+                self.model(input_ids, past_key_values=cache, use_cache=True)
+            logger.info(f"Cached system prompt prefix ({input_ids.shape[1]} tokens)")
+            return prefix_text, input_ids, cache
+        except Exception as e:
+            logger.warning(f"Could not cache the system prompt prefix: {e}")
+            return None
+    
+    def _compile_model(self):
+        """
+        Compiles the forward pass with Inductor so each decode step runs as
+        fused kernels instead of hundreds of small launches. Only forward is
+        wrapped, so generate() and the streaming path keep working as-is.
+        """
+        if not hasattr(torch, "compile") or not torch.cuda.is_available():
+            logger.warning("torch.compile needs PyTorch 2 and a CUDA GPU, running eager")
+            return
+        if model_config.llm_quantization != "none":
+            logger.warning("Skipping torch.compile for a bitsandbytes-quantized model")
+            return
+        
+        # accelerate may have wrapped forward with device/offload hooks for
+        # device_map="auto"; a failed compile has to put back exactly this
+        original_forward = self.model.forward
+        try:
+            # "reduce-overhead" captures CUDA graphs; a static KV cache keeps
+            # decode-step shapes fixed so one graph is replayed per token
+            # instead of being re-captured as the cache grows
+            self.model.generation_config.cache_implementation = "static"
+            # generate() keeps that one static cache on the model and resets
+            # it every call, so concurrent generations would clobber each
+            # other's keys/values; run them one at a time
+            self._generate_guard = Lock()
+            self.model.forward = torch.compile(self.model.forward, mode="reduce-overhead", fullgraph=True)
+            
+            # Compile now, at startup, rather than on the first user's message
+            warmup = self.tokenizer("Hello", return_tensors="pt").to(self.model.device)
+            with torch.no_grad():
+                self.model.generate(**warmup, max_new_tokens=4, pad_token_id=self.tokenizer.eos_token_id)
+            logger.info("LLM forward pass compiled")
+        except Exception as e:
+            logger.warning(f"torch.compile failed, running eager: {e}")
+            self.model.generation_config.cache_implementation = None
+            self._generate_guard = nullcontext()
+            self.model.forward = original_forward
+    
+    def _quantization_config(self) -> Optional[BitsAndBytesConfig]:
+        """
+        bitsandbytes settings for model_config.llm_quantization, or None for
+        full-precision weights. Decoding is memory-bound, so smaller weights
+        mean more tokens per second and room for bigger batches.
+        """
+        mode = model_config.llm_quantization
+        if mode == "none":
+            return None
+        if not torch.cuda.is_available():
+            logger.warning(f"Quantization '{mode}' needs a CUDA GPU, loading full-precision weights")
+            return None
+        
+        if mode == "int8":
+            return BitsAndBytesConfig(load_in_8bit=True)
+        if mode == "nf4":
+            return BitsAndBytesConfig(
+                load_in_4bit=True,
+                bnb_4bit_quant_type="nf4",
+                bnb_4bit_compute_dtype=torch.bfloat16,
+                bnb_4bit_use_double_quant=True
+            )
+        
+        logger.warning(f"Unknown quantization '{mode}', loading full-precision weights")
+        return None
+    
     def _initialize_fallback(self):
         """Initialize a fallback LLM for when the main model fails."""
         logger.info("Initializing fallback LLM")
@@ -97,65 +420,236 @@ class LLMPipeline:
         # Initialize conversation state
         self.conversations[conversation_id] = ConversationState(
             conversation_id=conversation_id,
-            messages=[],
+            # Oldest messages fall off on their own once the cap is reached
+            messages=deque(maxlen=conversation_config.max_conversation_length),
             lead_info={},
             behavioral_data={},
-            collected_fields=[]
+            collected_fields=[],
+            current_intent="researching",
+            current_score=50,
+            prefetched=[],
+            history_lines=deque(maxlen=_HISTORY_MESSAGES),
+            history_tail=""
         )
+        self.conversations.move_to_end(conversation_id)
+        while len(self.conversations) > conversation_config.max_active_conversations:
+            self.conversations.popitem(last=False)
         
-        # Generate greeting
-        greeting = get_prompt("greeting")
-        return greeting
+        # Greeting is the same for everyone
+        return self._greeting
     
     def process_message(self, conversation_id: str, user_message: str) -> Dict[str, Any]:
         """Process a user message and return the response with structured data."""
-        if conversation_id not in self.conversations:
+        conversation = self._get_conversation(conversation_id)
+        if conversation is None:
             return self._error_response("Conversation not found")
         
-        conversation = self.conversations[conversation_id]
-        
         try:
             # Add user message to conversation
-            conversation.messages.append({
-                'role': 'user',
-                'content': user_message,
-                'timestamp': self._get_timestamp()
-            })
+            self._add_user_message(conversation, user_message)
+            
+            # Opening questions repeat a lot, and follow-ups may have been
+            # prefetched; reuse an earlier answer when one fits
+            cached, cache_key = self._lookup_reply(conversation, user_message)
+            if cached is not None:
+                return self._finish_turn(conversation, user_message, cached)
             
             # Get relevant knowledge
-            product_knowledge = self.vector_store.get_product_knowledge(user_message)
-            case_studies = self.vector_store.get_case_studies(user_message)
-            competitor_info = self.vector_store.get_competitor_info(user_message)
+            product_knowledge, case_studies, competitor_info = self._retrieve_knowledge(user_message)
             
             # Generate response
             response = self._generate_response(conversation, user_message, product_knowledge, case_studies, competitor_info)
+            if cache_key is not None and not response.get('fallback'):
+                self.response_cache.store(cache_key, response['response'])
+            
+            return self._finish_turn(conversation, user_message, response['response'])
+            
+        except Exception as e:
+            logger.error(f"Error processing message: {e}")
+            return self._error_response(f"Error processing message: {str(e)}")
+    
+    def stream_message(self, conversation_id: str, user_message: str) -> Iterator[Dict[str, Any]]:
+        """
+        Streaming variant of process_message.
+        Yields the response text generated so far after every token chunk
+        (with structured_output set to None); the last item is the same
+        dict process_message would have returned.
+        """
+        conversation = self._get_conversation(conversation_id)
+        if conversation is None:
+            yield self._error_response("Conversation not found")
+            return
+        
+        try:
+            self._add_user_message(conversation, user_message)
             
-            # Add bot response to conversation
-            conversation.messages.append({
-                'role': 'assistant',
-                'content': response['response'],
-                'timestamp': self._get_timestamp()
-            })
+            cached, cache_key = self._lookup_reply(conversation, user_message)
+            if cached is not None:
+                yield self._finish_turn(conversation, user_message, cached)
+                return
             
-            # Update lead information
-            self._update_lead_info(conversation, user_message)
+            product_knowledge, case_studies, competitor_info = self._retrieve_knowledge(user_message)
             
-            # Generate structured output
-            structured_output = self._generate_structured_output(conversation, user_message)
+            response_text = ""
+            chunks = self._stream_response(conversation, user_message, product_knowledge, case_studies, competitor_info)
+            # closing() makes sure generation is told to stop if our own
+            # consumer walks away mid-reply (GeneratorExit isn't caught below)
+            with closing(chunks):
+                for chunk in chunks:
+                    response_text += chunk
+                    yield {
+                        'response': response_text,
+                        'structured_output': None,
+                        'conversation_id': conversation_id
+                    }
             
-            # Update conversation state
-            conversation.current_intent = structured_output['intent']
-            conversation.current_score = structured_output['score']
+            # Generation errors raise out of the loop above, so this is a real reply
+            if cache_key is not None:
+                self.response_cache.store(cache_key, response_text)
             
-            return {
-                'response': response['response'],
-                'structured_output': structured_output,
-                'conversation_id': conversation_id
-            }
+            yield self._finish_turn(conversation, user_message, response_text)
             
+        except torch.cuda.OutOfMemoryError as e:
+            logger.error(f"Out of GPU memory while streaming: {e}")
+            torch.cuda.empty_cache()
+            yield self._error_response("The model is overloaded right now")
         except Exception as e:
-            logger.error(f"Error processing message: {e}")
-            return self._error_response(f"Error processing message: {str(e)}")
+            logger.error(f"Error streaming message: {e}")
+            yield self._error_response(f"Error processing message: {str(e)}")
+    
+    def _get_conversation(self, conversation_id: str) -> Optional[ConversationState]:
+        """Looks up a conversation and marks it as recently used."""
+        conversation = self.conversations.get(conversation_id)
+        if conversation is not None:
+            try:
+                self.conversations.move_to_end(conversation_id)
+            except KeyError:
+                pass  # evicted or ended by another thread just now
+        return conversation
+    
+    def _lookup_reply(self, conversation: ConversationState, user_message: str) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Looks for a ready-made reply: the shared cache for opening messages,
+        otherwise whatever was prefetched for this conversation's next turn.
+        Returns (reply or None, key to cache the fresh reply under or None).
+        """
+        cache_key = self._opening_cache_key(conversation, user_message)
+        if cache_key is not None:
+            return self.response_cache.lookup(cache_key), cache_key
+        
+        # Prefetched replies only fit the turn they were made for
+        prefetched, conversation.prefetched = conversation.prefetched, []
+        if prefetched:
+            message = ResponseCache.normalize(user_message)
+            for entry in prefetched:
+                if entry.guess == message:
+                    return entry.reply, None
+            # A close paraphrase only gets the reply if it names the same
+            # lead details; "about 500 people" is near "about 50 people"
+            # but the reply to one is wrong for the other
+            lead_fields = _extract_lead_fields(user_message)
+            query = self._embed(user_message)
+            for entry in prefetched:
+                if entry.lead_fields == lead_fields and float(entry.embedding @ query) >= model_config.prefetch_match_threshold:
+                    return entry.reply, None
+        return None, None
+    
+    def _prefetch_next_turns(self, conversation: ConversationState):
+        """
+        Generates replies for the likeliest next messages in the background,
+        so a matching real message can be answered straight away.
+        """
+        if self.vector_store.embedding_model is None or (self.model is None and self.vllm_engine is None):
+            return
+        
+        missing = [key for key, _ in _FOLLOW_UP_GUESSES if key is None or not conversation.lead_info.get(key)]
+        guesses = [text for key, text in _FOLLOW_UP_GUESSES if key in missing][:model_config.prefetch_follow_ups]
+        last_message = conversation.messages[-1]
+        
+        def run():
+            ready = []
+            for guess in guesses:
+                # Same history the real turn would see, with the guess appended
+                hypothetical = replace(
+                    conversation,
+                    messages=list(conversation.messages),
+                    history_lines=deque(conversation.history_lines, maxlen=_HISTORY_MESSAGES),
+                    prefetched=[]
+                )
+                self._append_message(hypothetical, 'user', guess)
+                response = self._generate_response(hypothetical, guess, *self._retrieve_knowledge(guess))
+                if response.get('fallback'):
+                    return
+                ready.append(PrefetchedReply(
+                    ResponseCache.normalize(guess), _extract_lead_fields(guess), self._embed(guess), response['response']
+                ))
+            
+            # Too late if the user already moved on
+            if conversation.messages and conversation.messages[-1] is last_message:
+                conversation.prefetched = ready
+        
+        self._prefetch_pool.submit(run)
+    
+    def _opening_cache_key(self, conversation: ConversationState, user_message: str) -> Optional[str]:
+        """
+        Key to look the response cache up under, or None when this turn can't
+        use it. Only a conversation's first message is answered without any
+        history in the prompt, so later turns always go to the model. An
+        opener that gave away lead details (company, role, team size) gets
+        its own reply, since the cached one would speak to someone else.
+        """
+        if self.response_cache is None or len(conversation.messages) != 1:
+            return None
+        if self.model is None and self.vllm_engine is None:
+            return None
+        # lead_info starts empty, so anything in it came from this message
+        if conversation.lead_info:
+            return None
+        return self.response_cache.normalize(user_message)
+    
+    def _embed(self, text: str) -> np.ndarray:
+        """Unit-length embedding, so a dot product is the cosine similarity."""
+        return self.vector_store.embedding_model.encode([text], normalize_embeddings=True)[0].astype('float32', copy=False)
+    
+    def _append_message(self, conversation: ConversationState, role: str, content: str):
+        """Append a message and roll it into the prompt history tail."""
+        conversation.messages.append(Message(role, content, self._get_timestamp()))
+        conversation.history_lines.append(f"{'User' if role == 'user' else 'Assistant'}: {content}\n")
+        conversation.history_tail = "".join(conversation.history_lines)
+    
+    def _add_user_message(self, conversation: ConversationState, user_message: str):
+        """Record the user's message on the conversation."""
+        self._append_message(conversation, 'user', user_message)
+        
+        # Lead details only depend on what the user said, so pick them up
+        # now instead of after the reply has been generated
+        self._update_lead_info(conversation, user_message)
+    
+    def _retrieve_knowledge(self, user_message: str) -> Tuple[str, str, str]:
+        """Pull product docs, case studies and competitor info for a message."""
+        return self.vector_store.get_knowledge_bundle(user_message)
+    
+    def _finish_turn(self, conversation: ConversationState, user_message: str, response_text: str) -> Dict[str, Any]:
+        """Record the bot reply, refresh lead data and build the final result."""
+        # Add bot response to conversation
+        self._append_message(conversation, 'assistant', response_text)
+        
+        # Generate structured output (scoring reads the reply too, so this
+        # has to wait for generation to finish)
+        structured_output = self._generate_structured_output(conversation, user_message)
+        
+        # Update conversation state
+        conversation.current_intent = structured_output['intent']
+        conversation.current_score = structured_output['score']
+        
+        if FEATURE_FLAGS.enable_response_prefetch:
+            self._prefetch_next_turns(conversation)
+        
+        return {
+            'response': response_text,
+            'structured_output': structured_output,
+            'conversation_id': conversation.conversation_id
+        }
     
     def _generate_response(self, conversation: ConversationState, user_message: str, 
                           product_knowledge: str, case_studies: str, competitor_info: str) -> Dict[str, Any]:
@@ -166,56 +660,123 @@ class LLMPipeline:
         
         # Generate response using LLM
         try:
-            if self.llm:
+            if self.vllm_engine:
+                bot_response = "".join(self._vllm_stream(f"{context['system_prompt']}\n\n{context['user_prompt']}"))
+            elif self.llm:
                 # Use LangChain LLM
                 messages = [
                     SystemMessage(content=context['system_prompt']),
                     HumanMessage(content=context['user_prompt'])
                 ]
                 
-                response = self.llm.invoke(messages)
+                with self._generate_guard:
+                    response = self.llm.invoke(messages)
                 bot_response = response.content
             else:
                 # Fallback response
-                bot_response = self._generate_fallback_response(conversation, user_message)
+                return {'response': self._generate_fallback_response(conversation, user_message), 'fallback': True}
             
             return {'response': bot_response}
             
+        except torch.cuda.OutOfMemoryError as e:
+            logger.error(f"Out of GPU memory, using fallback response: {e}")
+            torch.cuda.empty_cache()
+            return {'response': self._generate_fallback_response(conversation, user_message), 'fallback': True}
         except Exception as e:
             logger.error(f"Error generating LLM response: {e}")
-            return {'response': self._generate_fallback_response(conversation, user_message)}
+            return {'response': self._generate_fallback_response(conversation, user_message), 'fallback': True}
+    
+    def _stream_response(self, conversation: ConversationState, user_message: str,
+                         product_knowledge: str, case_studies: str, competitor_info: str) -> Iterator[str]:
+        """Generate a conversational response, yielding text chunks as they decode."""
+        if not self.model and not self.vllm_engine:
+            yield self._generate_fallback_response(conversation, user_message)
+            return
+        
+        context = self._build_context(conversation, user_message, product_knowledge, case_studies, competitor_info)
+        prompt = f"{context['system_prompt']}\n\n{context['user_prompt']}"
+        
+        if self.vllm_engine:
+            yield from self._vllm_stream(prompt)
+            return
+        
+        inputs = self._prompt_inputs(prompt)
+        streamer = TextIteratorStreamer(self.tokenizer, skip_prompt=True, skip_special_tokens=True)
+        
+        # generate() blocks until done, so run it on a worker and drain the streamer here
+        generation_kwargs = dict(
+            **inputs,
+            streamer=streamer,
+            max_length=model_config.llm_max_length,
+            temperature=model_config.llm_temperature,
+            top_p=model_config.llm_top_p,
+            do_sample=True,
+            pad_token_id=self.tokenizer.eos_token_id
+        )
+        # Set when the consumer stops reading (client gone, Stop pressed) so
+        # the worker quits decoding instead of finishing an abandoned reply
+        stop_event = Event()
+        generation_kwargs['stopping_criteria'] = StoppingCriteriaList([_StopOnEvent(stop_event)])
+        
+        failures = []
+        
+        def run_generation():
+            try:
+                with self._generate_guard:
+                    self.model.generate(**generation_kwargs)
+            except Exception as e:
+                # Unblock the consumer, then re-raise over there
+                failures.append(e)
+                streamer.end()
+        
+        Thread(target=run_generation, daemon=True).start()
+        
+        try:
+            for chunk in streamer:
+                if chunk:
+                    yield chunk
+        finally:
+            stop_event.set()
+        
+        if failures:
+            raise failures[0]
+    
+    def _prompt_inputs(self, prompt: str) -> Dict[str, Any]:
+        """
+        generate() kwargs for a prompt. When it starts with the cached system
+        prefix, only the rest is tokenized and the prefix's KV cache is
+        handed over (copied, since generate() extends it in place).
+        """
+        if self._system_prefix is not None:
+            prefix_text, prefix_ids, prefix_cache = self._system_prefix
+            if prompt.startswith(prefix_text):
+                rest_ids = self.tokenizer(
+                    prompt[len(prefix_text):], return_tensors="pt", add_special_tokens=False
+                ).input_ids.to(self.model.device)
+                input_ids = torch.cat([prefix_ids, rest_ids], dim=1)
+                return {
+                    'input_ids': input_ids,
+                    'attention_mask': torch.ones_like(input_ids),
+                    'past_key_values': copy.deepcopy(prefix_cache)
+                }
+        
+        return dict(self.tokenizer(prompt, return_tensors="pt").to(self.model.device))
     
     def _build_context(self, conversation: ConversationState, user_message: str,
                       product_knowledge: str, case_studies: str, competitor_info: str) -> Dict[str, str]:
         """Build context for LLM generation."""
         
         # System prompt
-        system_prompt = get_prompt("system")
-        
-        # Build conversation history
-        conversation_history = ""
-        for msg in conversation.messages[-5:]:  # Last 5 messages
-            role = "User" if msg['role'] == 'user' else "Assistant"
-            conversation_history += f"{role}: {msg['content']}\n"
+        system_prompt = self._system_prompt
         
         # Build user prompt
-        user_prompt = f"""
-Conversation History:
-{conversation_history}
-
-Available Product Knowledge:
-{product_knowledge}
-
-Case Studies:
-{case_studies}
-
-Competitor Information:
-{competitor_info}
-
-User Message: {user_message}
-
-Please respond naturally while gathering qualification information and providing helpful product information.
-"""
+        user_prompt = _USER_PROMPT_TEMPLATE.format(
+            history=conversation.history_tail,
+            product_knowledge=product_knowledge,
+            case_studies=case_studies,
+            competitor_info=competitor_info,
+            user_message=user_message
+        )
         
         return {
             'system_prompt': system_prompt,
@@ -245,51 +806,7 @@ Please respond naturally while gathering qualification information and providing
     
     def _update_lead_info(self, conversation: ConversationState, user_message: str):
         """Update lead information from the conversation."""
-        # Simple extraction - in production, you'd use NER or more sophisticated extraction
-        user_message_lower = user_message.lower()
-        
-        # Extract company name (simple pattern matching)
-        company_patterns = [
-            r"at (\w+)",
-            r"from (\w+)",
-            r"work for (\w+)",
-            r"company (\w+)"
-        ]
-        
-        for pattern in company_patterns:
-            match = re.search(pattern, user_message_lower)
-            if match:
-                conversation.lead_info['company'] = match.group(1).title()
-                break
-        
-        # Extract role
-        role_patterns = [
-            r"(\w+ manager)",
-            r"(\w+ director)",
-            r"(\w+ lead)",
-            r"(\w+ engineer)",
-            r"(\w+ analyst)"
-        ]
-        
-        for pattern in role_patterns:
-            match = re.search(pattern, user_message_lower)
-            if match:
-                conversation.lead_info['role'] = match.group(1)
-                break
-        
-        # Extract team size
-        team_size_patterns = [
-            r"(\d+) person",
-            r"(\d+) people",
-            r"team of (\d+)",
-            r"(\d+) employees"
-        ]
-        
-        for pattern in team_size_patterns:
-            match = re.search(pattern, user_message_lower)
-            if match:
-                conversation.lead_info['team_size'] = int(match.group(1))
-                break
+        conversation.lead_info.update(_extract_lead_fields(user_message))
     
     def _generate_structured_output(self, conversation: ConversationState, user_message: str) -> Dict[str, Any]:
         """Generate structured JSON output for the lead."""
@@ -343,13 +860,7 @@ Please respond naturally while gathering qualification information and providing
                 tags.append('smb')
         
         # Priority tags
-        score = prediction['score']
-        if score >= 80:
-            tags.append('high_priority')
-        elif score >= 60:
-            tags.append('medium_priority')
-        else:
-            tags.append('low_priority')
+        tags.append(_PRIORITY_TAGS[bisect_right(_PRIORITY_CUTOFFS, prediction['score'])])
         
         # Intent-based tags
         intent = prediction['intent']
@@ -360,10 +871,7 @@ Please respond naturally while gathering qualification information and providing
         
         # Tool migration tags
         signals_text = ' '.join(prediction['signals']).lower()
-        if 'salesforce' in signals_text:
-            tags.append('salesforce_migration')
-        if 'hubspot' in signals_text:
-            tags.append('hubspot_migration')
+        tags.extend(tag for keyword, tag in _MIGRATION_TAGS if keyword in signals_text)
         
         return tags[:5]  # Return top 5 tags
     
@@ -382,10 +890,9 @@ Please respond naturally while gathering qualification information and providing
         else:
             return f"Lead in {intent} phase - nurture email to maintain engagement and provide value."
     
-    def _get_timestamp(self) -> str:
-        """Get current timestamp."""
-        from datetime import datetime
-        return datetime.now().isoformat()
+    def _get_timestamp(self) -> int:
+        """Get current timestamp (nanoseconds since the epoch; format when displaying)."""
+        return time.time_ns()
     
     def _error_response(self, error_message: str) -> Dict[str, Any]:
         """Generate an error response."""
@@ -433,17 +940,21 @@ Please respond naturally while gathering qualification information and providing
                                   recommended_action=conversation.current_intent)
         
         # Remove conversation from memory
-        del self.conversations[conversation_id]
+        self.conversations.pop(conversation_id, None)
         
         return closing_prompt
 
 
 # Global LLM pipeline instance
 _llm_pipeline = None
+_llm_pipeline_lock = Lock()
 
 def get_llm_pipeline() -> LLMPipeline:
     """Get the global LLM pipeline instance."""
     global _llm_pipeline
     if _llm_pipeline is None:
-        _llm_pipeline = LLMPipeline()
+        # Only build it once even if first uses race
+        with _llm_pipeline_lock:
+            if _llm_pipeline is None:
+                _llm_pipeline = LLMPipeline()
     return _llm_pipeline
@@ -2,24 +2,86 @@
 Predictive model for lead scoring and intent classification using LightGBM.
 """
 
+import ast
 import os
-import pickle
+import sys
+import threading
 import json
 import numpy as np
-import pandas as pd
-from typing import Dict, List, Any, Optional, Tuple
+from typing import TYPE_CHECKING, Dict, Iterable, List, Any, Optional, Tuple
 from dataclasses import dataclass
-
-import lightgbm as lgb
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import LabelEncoder
-from sklearn.metrics import accuracy_score, classification_report, roc_auc_score
+from itertools import repeat
 
 from config.settings import predictive_config
 from utils.logging import get_logger
 
+# lightgbm, pandas and scikit-learn are imported where they're used, so
+# importing this module (or scoring with a saved model) doesn't pay for
+# the training-only stack
+if TYPE_CHECKING:
+    import lightgbm as lgb
+    import pandas as pd
+
 logger = get_logger(__name__)
 
+# Column types for crm_data.csv, so pandas doesn't have to infer them
+TRAINING_DATA_DTYPES = {
+    'messages': str,
+    'lead_info': str,
+    'behavioral_data': str,
+    'intent': 'category',
+    'conversion_score': 'float32'
+}
+
+# Model input columns, in the order the classifier was trained on
+FEATURE_COLUMNS = (
+    'message_count', 'avg_message_length', 'question_count', 'engagement_score',
+    'budget_mentioned', 'timeline_mentioned', 'pain_points_clear', 'decision_maker',
+    'urgency_indicators', 'team_size', 'role_authority', 'pages_visited',
+    'trial_usage', 'email_opens', 'demo_requested', 'feature_questions',
+    'pricing_questions', 'integration_questions', 'competitor_mentions',
+    'company_size_category_enterprise', 'company_size_category_mid_market',
+    'company_size_category_smb'
+)
+
+# Column position of each feature in the model input matrix
+_FEATURE_INDEX = {name: i for i, name in enumerate(FEATURE_COLUMNS)}
+
+# Score adjustment per predicted intent
+_INTENT_SCORES = {
+    'buy_soon': 30,
+    'considering': 15,
+    'researching': 0,
+    'not_interested': -20
+}
+
+# Keyword sets for the intent signals, checked against the whole conversation
+_BUDGET_KEYWORDS = ('budget', 'cost', 'price', 'pricing', 'expensive', 'cheap', 'afford')
+_TIMELINE_KEYWORDS = ('timeline', 'deadline', 'soon', 'urgent', 'asap', 'month', 'quarter')
+_PAIN_KEYWORDS = ('problem', 'issue', 'challenge', 'difficult', 'struggle', 'need')
+_DECISION_KEYWORDS = ('decision', 'approve', 'final', 'manager', 'director', 'vp', 'ceo')
+_URGENCY_KEYWORDS = ('urgent', 'asap', 'immediately', 'quick', 'fast', 'now')
+
+# Role keyword -> authority score. Checked in this order and the first hit
+# wins, so "senior manager" scores as a manager
+_AUTHORITY_KEYWORDS = (
+    ('ceo', 1.0), ('cto', 0.9), ('vp', 0.8), ('director', 0.7), ('manager', 0.6),
+    ('head', 0.7), ('lead', 0.6), ('senior', 0.5), ('junior', 0.3)
+)
+
+# Product interest keywords, counted per message: feature, pricing,
+# integration and competitor questions, in that order
+_INTEREST_KEYWORDS = (
+    ('feature', 'capability', 'function'),
+    ('price', 'cost', 'pricing', 'plan'),
+    ('integrate', 'api', 'connection'),
+    ('salesforce', 'hubspot', 'competitor')
+)
+
+def _message_contents(messages) -> List[str]:
+    """Message texts; live conversations hold Message tuples, training data holds dicts."""
+    return [msg.get('content', '') if isinstance(msg, dict) else msg.content for msg in messages]
+
 @dataclass
 class LeadFeatures:
     """Feature extraction for lead scoring."""
@@ -62,9 +124,15 @@ class LeadScoringModel:
         """Initialize the predictive model."""
         self.model_path = model_path or predictive_config.model_path
         self.model = None
-        self.intent_encoder = LabelEncoder()
+        # Trained trees; predictions go through this, self.model is for fitting
+        self.booster = None
+        # Fitted in train(); a loaded model only needs the label snapshot
+        self.intent_encoder = None
         self.feature_names = []
         self.is_trained = False
+        self.compiled_model = None
+        # Intent label per booster output column, as plain interned strings
+        self._intent_labels = []
         
         # Create model directory if it doesn't exist
         os.makedirs(os.path.dirname(self.model_path), exist_ok=True)
@@ -85,7 +153,15 @@ class LeadScoringModel:
     
     def _initialize_model(self):
         """Initialize a new LightGBM model."""
-        self.model = lgb.LGBMClassifier(
+        self.model = self._new_classifier()
+        self.is_trained = False
+        logger.info("Initialized new LightGBM model")
+    
+    def _new_classifier(self) -> "lgb.LGBMClassifier":
+        """Untrained intent classifier."""
+        import lightgbm as lgb
+        
+        return lgb.LGBMClassifier(
             n_estimators=100,
             learning_rate=0.1,
             max_depth=6,
@@ -93,67 +169,135 @@ class LeadScoringModel:
             random_state=42,
             verbose=-1
         )
-        self.is_trained = False
-        logger.info("Initialized new LightGBM model")
+    
+    def _metadata_path(self) -> str:
+        """JSON sidecar holding what the booster file doesn't: labels and feature names."""
+        return f"{os.path.splitext(self.model_path)[0]}.json"
     
     def _load_model(self):
         """Load the trained model from disk."""
-        with open(self.model_path, 'rb') as f:
-            model_data = pickle.load(f)
+        with open(self._metadata_path(), 'r') as f:
+            metadata = json.load(f)
+        
+        import lightgbm as lgb
         
-        self.model = model_data['model']
-        self.intent_encoder = model_data['intent_encoder']
-        self.feature_names = model_data['feature_names']
+        # Native LightGBM text model; no pickled sklearn objects
+        self.booster = lgb.Booster(model_file=self.model_path)
+        self.model = self._new_classifier()
+        self.feature_names = metadata['feature_names']
+        self._intent_labels = [sys.intern(label) for label in metadata['intent_labels']]
         self.is_trained = True
+        self.compiled_model = self._compile_trees()
     
     def _save_model(self):
         """Save the trained model to disk."""
-        model_data = {
-            'model': self.model,
-            'intent_encoder': self.intent_encoder,
+        self.booster.save_model(self.model_path)
+        
+        metadata = {
+            'intent_labels': self._intent_labels,
             'feature_names': self.feature_names
         }
-        
-        with open(self.model_path, 'wb') as f:
-            pickle.dump(model_data, f)
+        with open(self._metadata_path(), 'w') as f:
+            json.dump(metadata, f)
         
         logger.info("Model saved successfully")
     
+    def _snapshot_intent_labels(self) -> List[str]:
+        """
+        Decoded intent for each booster output column, so prediction is a
+        list lookup instead of inverse_transform's validation. Encoder
+        classes are numpy.str_; these are plain interned strs so comparisons
+        against the INTENT_LABELS literals are pointer checks.
+        """
+        return [sys.intern(str(self.intent_encoder.classes_[encoded])) for encoded in self.model.classes_]
+    
+    def _compile_trees(self, rebuild: bool = False):
+        """
+        Compiles the trained booster to native code with lleaves, caching
+        the shared object next to the model file. Returns None (plain LightGBM
+        scoring) when disabled, unavailable or on any failure.
+        """
+        if not predictive_config.compile_trees:
+            return None
+        # lleaves is optional; only needed when compile_trees is on
+        try:
+            import lleaves
+        except ImportError:
+            logger.warning("SCORER_COMPILE is set but lleaves is not installed")
+            return None
+        
+        library_path = f"{os.path.splitext(self.model_path)[0]}.so"
+        try:
+            # A library older than the model file was built from other trees
+            if os.path.exists(library_path) and (
+                    rebuild or os.path.getmtime(library_path) < os.path.getmtime(self.model_path)):
+                os.remove(library_path)
+            
+            compiled = lleaves.Model(model_file=self.model_path)
+            compiled.compile(cache=library_path)
+            logger.info("Compiled lead scoring trees with lleaves")
+            return compiled
+        except Exception as e:
+            logger.warning(f"Could not compile lead scoring trees, using LightGBM: {e}")
+            return None
+    
+    def _predict_intents(self, X: np.ndarray) -> List[str]:
+        """Intent per row, from the compiled trees when available."""
+        if self.compiled_model is not None:
+            probabilities = self.compiled_model.predict(X)
+        else:
+            probabilities = self.booster.predict(
+                X,
+                num_threads=predictive_config.predict_num_threads,
+                pred_early_stop=predictive_config.predict_early_stop,
+                pred_early_stop_freq=predictive_config.predict_early_stop_freq,
+                pred_early_stop_margin=predictive_config.predict_early_stop_margin
+            )
+        
+        if probabilities.ndim == 1:
+            # Binary objective: probability of the second class
+            columns = (probabilities > 0.5).astype(int)
+        else:
+            columns = np.argmax(probabilities, axis=1)
+        
+        labels = self._intent_labels
+        return [labels[column] for column in columns]
+    
     def extract_features(self, conversation_data: Dict[str, Any]) -> LeadFeatures:
         """Extract features from conversation and lead data."""
         features = LeadFeatures()
         
-        # Extract conversation features
+        # Extract conversation features, one pass over the messages
         messages = conversation_data.get('messages', [])
         features.message_count = len(messages)
         
+        total_length = 0
+        interest_counts = [0] * len(_INTEREST_KEYWORDS)
+        lowered = []
+        for content in _message_contents(messages):
+            total_length += len(content)
+            if '?' in content:
+                features.question_count += 1
+            
+            content = content.lower()
+            lowered.append(content)
+            has = content.__contains__
+            for i, keywords in enumerate(_INTEREST_KEYWORDS):
+                if any(map(has, keywords)):
+                    interest_counts[i] += 1
+        
         if messages:
-            message_lengths = [len(msg.get('content', '')) for msg in messages]
-            features.avg_message_length = np.mean(message_lengths)
-            features.question_count = sum(1 for msg in messages if '?' in msg.get('content', ''))
+            features.avg_message_length = total_length / len(messages)
         
         # Extract intent signals
-        conversation_text = ' '.join([msg.get('content', '') for msg in messages]).lower()
-        
-        # Budget signals
-        budget_keywords = ['budget', 'cost', 'price', 'pricing', 'expensive', 'cheap', 'afford']
-        features.budget_mentioned = any(keyword in conversation_text for keyword in budget_keywords)
-        
-        # Timeline signals
-        timeline_keywords = ['timeline', 'deadline', 'soon', 'urgent', 'asap', 'month', 'quarter']
-        features.timeline_mentioned = any(keyword in conversation_text for keyword in timeline_keywords)
+        conversation_text = ' '.join(lowered)
+        mentioned = conversation_text.__contains__
         
-        # Pain points
-        pain_keywords = ['problem', 'issue', 'challenge', 'difficult', 'struggle', 'need']
-        features.pain_points_clear = any(keyword in conversation_text for keyword in pain_keywords)
-        
-        # Decision maker signals
-        decision_keywords = ['decision', 'approve', 'final', 'manager', 'director', 'vp', 'ceo']
-        features.decision_maker = any(keyword in conversation_text for keyword in decision_keywords)
-        
-        # Urgency indicators
-        urgency_keywords = ['urgent', 'asap', 'immediately', 'quick', 'fast', 'now']
-        features.urgency_indicators = sum(1 for keyword in urgency_keywords if keyword in conversation_text)
+        features.budget_mentioned = any(map(mentioned, _BUDGET_KEYWORDS))
+        features.timeline_mentioned = any(map(mentioned, _TIMELINE_KEYWORDS))
+        features.pain_points_clear = any(map(mentioned, _PAIN_KEYWORDS))
+        features.decision_maker = any(map(mentioned, _DECISION_KEYWORDS))
+        features.urgency_indicators = sum(map(mentioned, _URGENCY_KEYWORDS))
         
         # Extract demographic features
         lead_info = conversation_data.get('lead_info', {})
@@ -175,15 +319,9 @@ class LeadScoringModel:
         
         # Role authority scoring
         role = lead_info.get('role', '').lower()
-        authority_keywords = {
-            'ceo': 1.0, 'cto': 0.9, 'vp': 0.8, 'director': 0.7, 'manager': 0.6,
-            'head': 0.7, 'lead': 0.6, 'senior': 0.5, 'junior': 0.3
-        }
-        
-        for keyword, score in authority_keywords.items():
-            if keyword in role:
-                features.role_authority = score
-                break
+        features.role_authority = next(
+            (score for keyword, score in _AUTHORITY_KEYWORDS if keyword in role), 0.0
+        )
         
         # Extract behavioral features
         behavioral_data = conversation_data.get('behavioral_data', {})
@@ -192,15 +330,9 @@ class LeadScoringModel:
         features.email_opens = behavioral_data.get('email_opens', 0)
         features.demo_requested = behavioral_data.get('demo_requested', False)
         
-        # Product interest features
-        features.feature_questions = sum(1 for msg in messages if any(word in msg.get('content', '').lower() 
-                                                                    for word in ['feature', 'capability', 'function']))
-        features.pricing_questions = sum(1 for msg in messages if any(word in msg.get('content', '').lower() 
-                                                                    for word in ['price', 'cost', 'pricing', 'plan']))
-        features.integration_questions = sum(1 for msg in messages if any(word in msg.get('content', '').lower() 
-                                                                        for word in ['integrate', 'api', 'connection']))
-        features.competitor_mentions = sum(1 for msg in messages if any(word in msg.get('content', '').lower() 
-                                                                      for word in ['salesforce', 'hubspot', 'competitor']))
+        # Product interest features (counted per message above)
+        (features.feature_questions, features.pricing_questions,
+         features.integration_questions, features.competitor_mentions) = interest_counts
         
         # Calculate engagement score
         features.engagement_score = (
@@ -212,58 +344,72 @@ class LeadScoringModel:
         
         return features
     
-    def features_to_dataframe(self, features: LeadFeatures) -> pd.DataFrame:
+    def features_to_dataframe(self, features: LeadFeatures) -> "pd.DataFrame":
         """Convert LeadFeatures to pandas DataFrame."""
-        feature_dict = {
-            'message_count': features.message_count,
-            'avg_message_length': features.avg_message_length,
-            'question_count': features.question_count,
-            'engagement_score': features.engagement_score,
-            'budget_mentioned': features.budget_mentioned,
-            'timeline_mentioned': features.timeline_mentioned,
-            'pain_points_clear': features.pain_points_clear,
-            'decision_maker': features.decision_maker,
-            'urgency_indicators': features.urgency_indicators,
-            'team_size': features.team_size or 0,
-            'role_authority': features.role_authority,
-            'pages_visited': features.pages_visited,
-            'trial_usage': features.trial_usage,
-            'email_opens': features.email_opens,
-            'demo_requested': features.demo_requested,
-            'feature_questions': features.feature_questions,
-            'pricing_questions': features.pricing_questions,
-            'integration_questions': features.integration_questions,
-            'competitor_mentions': features.competitor_mentions
-        }
-        
-        # Add categorical features
-        feature_dict['company_size_category_enterprise'] = features.company_size_category == 'enterprise'
-        feature_dict['company_size_category_mid_market'] = features.company_size_category == 'mid_market'
-        feature_dict['company_size_category_smb'] = features.company_size_category == 'smb'
+        import pandas as pd
         
-        return pd.DataFrame([feature_dict])
+        return pd.DataFrame([self._feature_values(features)], columns=FEATURE_COLUMNS)
+    
+    def _feature_values(self, features: LeadFeatures) -> Tuple:
+        """Model inputs for one lead, in FEATURE_COLUMNS order."""
+        return (
+            features.message_count,
+            features.avg_message_length,
+            features.question_count,
+            features.engagement_score,
+            features.budget_mentioned,
+            features.timeline_mentioned,
+            features.pain_points_clear,
+            features.decision_maker,
+            features.urgency_indicators,
+            features.team_size or 0,
+            features.role_authority,
+            features.pages_visited,
+            features.trial_usage,
+            features.email_opens,
+            features.demo_requested,
+            features.feature_questions,
+            features.pricing_questions,
+            features.integration_questions,
+            features.competitor_mentions,
+            # One-hot company size
+            features.company_size_category == 'enterprise',
+            features.company_size_category == 'mid_market',
+            features.company_size_category == 'smb'
+        )
     
-    def train(self, training_data: List[Dict[str, Any]]):
-        """Train the model on historical CRM data."""
-        if len(training_data) < predictive_config.min_samples_for_training:
+    def train(self, training_data: Iterable[Dict[str, Any]], n_samples: Optional[int] = None):
+        """
+        Train the model on historical CRM data. training_data may be a
+        one-shot iterator, in which case n_samples must give its length;
+        rows are turned into features as they arrive, never all held at once.
+        """
+        if n_samples is None:
+            n_samples = len(training_data)
+        if n_samples < predictive_config.min_samples_for_training:
             logger.warning(f"Insufficient training data. Need at least {predictive_config.min_samples_for_training} samples.")
             return
         
-        # Extract features and labels
-        X = []
-        y_intent = []
-        y_score = []
+        import pandas as pd
+        from sklearn.metrics import accuracy_score
+        from sklearn.model_selection import train_test_split
+        from sklearn.preprocessing import LabelEncoder
         
-        for data_point in training_data:
-            features = self.extract_features(data_point)
-            X.append(self.features_to_dataframe(features))
-            y_intent.append(data_point.get('intent', 'researching'))
-            y_score.append(data_point.get('conversion_score', 0))
+        # Extract features and labels into preallocated arrays
+        X = np.empty((n_samples, len(FEATURE_COLUMNS)), dtype=np.float32)
+        y_intent = np.empty(n_samples, dtype=object)
+        y_score = np.empty(n_samples, dtype=np.float32)
         
-        # Combine features
-        X_combined = pd.concat(X, ignore_index=True)
+        for i, data_point in enumerate(training_data):
+            X[i] = self._feature_values(self.extract_features(data_point))
+            y_intent[i] = data_point.get('intent', 'researching')
+            y_score[i] = data_point.get('conversion_score', 0)
+        
+        # Wrap once so the model keeps its feature names
+        X_combined = pd.DataFrame(X, columns=FEATURE_COLUMNS, copy=False)
         
         # Encode intent labels
+        self.intent_encoder = LabelEncoder()
         y_intent_encoded = self.intent_encoder.fit_transform(y_intent)
         
         # Split data
@@ -273,6 +419,8 @@ class LeadScoringModel:
         
         # Train intent classification model
         self.model.fit(X_train, y_train_intent)
+        self.booster = self.model.booster_
+        self._intent_labels = self._snapshot_intent_labels()
         
         # Evaluate model
         y_pred_intent = self.model.predict(X_test)
@@ -286,6 +434,7 @@ class LeadScoringModel:
         
         # Save model
         self._save_model()
+        self.compiled_model = self._compile_trees(rebuild=True)
         
         return {
             'accuracy': accuracy,
@@ -294,21 +443,32 @@ class LeadScoringModel:
     
     def predict(self, conversation_data: Dict[str, Any]) -> Dict[str, Any]:
         """Predict lead score and intent."""
+        return self.predict_batch([conversation_data])[0]
+    
+    def predict_batch(self, conversations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Predict several leads with a single model call; results in input order."""
+        if not conversations:
+            return []
         if not self.is_trained:
             logger.warning("Model not trained. Using default predictions.")
-            return self._default_prediction()
+            return [self._default_prediction() for _ in conversations]
         
-        # Extract features
-        features = self.extract_features(conversation_data)
-        X = self.features_to_dataframe(features)
+        # Extract features straight into one preallocated float32 matrix,
+        # the dtype LightGBM predicts on without an internal copy
+        features = [self.extract_features(data) for data in conversations]
+        X = np.empty((len(features), len(FEATURE_COLUMNS)), dtype=np.float32)
+        for i, f in enumerate(features):
+            X[i] = self._feature_values(f)
         
-        # Predict intent
-        intent_encoded = self.model.predict(X)[0]
-        intent = self.intent_encoder.inverse_transform([intent_encoded])[0]
-        
-        # Calculate score based on features and intent
-        score = self._calculate_score(features, intent)
+        # Predict intent, then score every lead in one go
+        intents = self._predict_intents(X)
+        scores = self._calculate_scores(X, intents)
         
+        return [self._build_prediction(f, intent, int(score))
+                for f, intent, score in zip(features, intents, scores)]
+    
+    def _build_prediction(self, features: LeadFeatures, intent: str, score: int) -> Dict[str, Any]:
+        """Turn features, predicted intent and score into the full prediction dict."""
         # Generate signals
         signals = self._extract_signals(features)
         
@@ -333,50 +493,41 @@ class LeadScoringModel:
             'features': LeadFeatures()
         }
     
-    def _calculate_score(self, features: LeadFeatures, intent: str) -> int:
-        """Calculate lead score based on features and intent."""
-        base_score = 50
+    def _calculate_scores(self, X: np.ndarray, intents) -> np.ndarray:
+        """
+        Lead scores (0-100) for every row of a feature matrix at once.
+        Same rules and addition order as scoring one lead at a time, just
+        as whole-column arithmetic.
+        """
+        # Sum in float64 like the scalar rules did
+        column = lambda name: X[:, _FEATURE_INDEX[name]].astype(np.float64)
         
         # Intent-based scoring
-        intent_scores = {
-            'buy_soon': 30,
-            'considering': 15,
-            'researching': 0,
-            'not_interested': -20
-        }
-        base_score += intent_scores.get(intent, 0)
+        base_score = 50 + np.fromiter((_INTENT_SCORES.get(intent, 0) for intent in intents),
+                                      dtype=np.float64, count=len(X))
         
-        # Feature-based scoring
-        if features.budget_mentioned:
-            base_score += 10
-        if features.timeline_mentioned:
-            base_score += 10
-        if features.pain_points_clear:
-            base_score += 15
-        if features.decision_maker:
-            base_score += 20
-        if features.urgency_indicators > 0:
-            base_score += features.urgency_indicators * 5
+        # Feature-based scoring (flags are stored as 0/1)
+        base_score += column('budget_mentioned') * 10
+        base_score += column('timeline_mentioned') * 10
+        base_score += column('pain_points_clear') * 15
+        base_score += column('decision_maker') * 20
+        base_score += column('urgency_indicators') * 5
         
         # Engagement scoring
-        base_score += min(features.engagement_score * 10, 20)
+        base_score += np.minimum(column('engagement_score') * 10, 20)
         
         # Team size scoring
-        if features.team_size:
-            if features.team_size > 100:
-                base_score += 10
-            elif features.team_size > 10:
-                base_score += 5
+        team_size = column('team_size')
+        base_score += np.where(team_size > 100, 10, np.where(team_size > 10, 5, 0))
         
         # Behavioral scoring
-        base_score += min(features.pages_visited * 2, 10)
-        base_score += min(features.trial_usage * 20, 20)
-        base_score += min(features.email_opens, 10)
-        if features.demo_requested:
-            base_score += 15
+        base_score += np.minimum(column('pages_visited') * 2, 10)
+        base_score += np.minimum(column('trial_usage') * 20, 20)
+        base_score += np.minimum(column('email_opens'), 10)
+        base_score += column('demo_requested') * 15
         
-        # Clamp score to 0-100 range
-        return max(0, min(100, int(base_score)))
+        # Truncate like int(), then clamp score to 0-100 range
+        return np.clip(np.trunc(base_score), 0, 100).astype(int)
     
     def _extract_signals(self, features: LeadFeatures) -> List[str]:
         """Extract top signals from features."""
@@ -416,99 +567,124 @@ class LeadScoringModel:
             return "nurture_email"
 
 
+def _csv_engine() -> str:
+    """
+    Arrow's CSV reader is much faster than the default parser; use it when
+    pyarrow is installed.
+    """
+    try:
+        import pyarrow  # noqa: F401
+        return "pyarrow"
+    except ImportError:
+        return "c"
+
+# Marks a training CSV cell that couldn't be parsed
+_UNPARSEABLE = object()
+
+def _parse_literal(text, default_type):
+    """Parse one cleaned cell as a Python literal, falling back to JSON."""
+    if not isinstance(text, str):
+        # Missing value
+        return _UNPARSEABLE
+    if not text or text == repr(default_type()):
+        return default_type()
+    try:
+        return ast.literal_eval(text)
+    except Exception:
+        pass
+    try:
+        return json.loads(text)
+    except Exception:
+        return _UNPARSEABLE
+
+def _parse_literal_column(df: "pd.DataFrame", column: str, default_type) -> "pd.Series":
+    """
+    Parse a column of serialized lists/dicts from the training CSV. Escaped
+    quotes and one pair of wrapping quotes are cleaned up with vectorized
+    string ops before parsing; bad cells come back as _UNPARSEABLE.
+    """
+    import pandas as pd
+    
+    if column not in df.columns:
+        return pd.Series([default_type() for _ in range(len(df))], index=df.index, dtype=object)
+    
+    cleaned = (
+        df[column]
+        .str.replace("\\'", "'", regex=False)
+        .str.replace('\\"', '"', regex=False)
+        .str.replace(r'(?s)\A"(.*)"\Z', r'\1', regex=True)
+    )
+    return cleaned.map(lambda text: _parse_literal(text, default_type))
+
 # Global model instance
 _predictive_model = None
+_predictive_model_lock = threading.Lock()
 
 def get_predictive_model() -> LeadScoringModel:
     """Get the global predictive model instance."""
     global _predictive_model
     if _predictive_model is None:
-        _predictive_model = LeadScoringModel()
+        # Only build it once even if first uses race
+        with _predictive_model_lock:
+            if _predictive_model is None:
+                _predictive_model = LeadScoringModel()
     return _predictive_model
 
 def train_model_from_data(training_data_path: str):
     """Train the model from a CSV file with historical CRM data."""
     model = get_predictive_model()
     
+    # A saved model newer than the CSV was trained on this data already
+    if (model.is_trained and os.path.exists(model.model_path)
+            and os.path.getmtime(model.model_path) >= os.path.getmtime(training_data_path)):
+        logger.info("Saved model is up to date with the training data, skipping retrain")
+        return None
+    
     try:
-        import json
-        import ast
+        import pandas as pd
         
         # Load training data
-        df = pd.read_csv(training_data_path)
+        df = pd.read_csv(training_data_path, dtype=TRAINING_DATA_DTYPES, engine=_csv_engine())
         
-        # Convert to training format
-        training_data = []
-        for _, row in df.iterrows():
-            try:
-                # Parse messages (list of dicts)
-                messages_str = row.get('messages', '[]')
-                if messages_str and messages_str != '[]':
-                    # Clean up the string - replace escaped quotes and fix formatting
-                    messages_str = messages_str.replace("\\'", "'").replace('\\"', '"')
-                    # Remove outer quotes if present
-                    if messages_str.startswith('"') and messages_str.endswith('"'):
-                        messages_str = messages_str[1:-1]
-                    try:
-                        messages = ast.literal_eval(messages_str)
-                    except:
-                        # Fallback to json.loads if ast.literal_eval fails
-                        import json
-                        messages = json.loads(messages_str)
-                else:
-                    messages = []
-                
-                # Parse lead_info (dict)
-                lead_info_str = row.get('lead_info', '{}')
-                if lead_info_str and lead_info_str != '{}':
-                    # Clean up the string
-                    lead_info_str = lead_info_str.replace("\\'", "'").replace('\\"', '"')
-                    if lead_info_str.startswith('"') and lead_info_str.endswith('"'):
-                        lead_info_str = lead_info_str[1:-1]
-                    try:
-                        lead_info = ast.literal_eval(lead_info_str)
-                    except:
-                        import json
-                        lead_info = json.loads(lead_info_str)
-                else:
-                    lead_info = {}
-                
-                # Parse behavioral_data (dict)
-                behavioral_data_str = row.get('behavioral_data', '{}')
-                if behavioral_data_str and behavioral_data_str != '{}':
-                    # Clean up the string
-                    behavioral_data_str = behavioral_data_str.replace("\\'", "'").replace('\\"', '"')
-                    if behavioral_data_str.startswith('"') and behavioral_data_str.endswith('"'):
-                        behavioral_data_str = behavioral_data_str[1:-1]
-                    try:
-                        behavioral_data = ast.literal_eval(behavioral_data_str)
-                    except:
-                        import json
-                        behavioral_data = json.loads(behavioral_data_str)
-                else:
-                    behavioral_data = {}
-                
-                data_point = {
-                    'messages': messages,
-                    'lead_info': lead_info,
-                    'behavioral_data': behavioral_data,
-                    'intent': row.get('intent', 'researching'),
-                    'conversion_score': row.get('conversion_score', 0)
-                }
-                training_data.append(data_point)
-                
-            except Exception as row_error:
-                logger.warning(f"Error parsing row {_}: {row_error}")
-                continue
-        
-        if not training_data:
+        # Parse each serialized column in one vectorized pass
+        messages = _parse_literal_column(df, 'messages', list)
+        lead_info = _parse_literal_column(df, 'lead_info', dict)
+        behavioral_data = _parse_literal_column(df, 'behavioral_data', dict)
+        intents = df['intent'] if 'intent' in df.columns else repeat('researching')
+        scores = df['conversion_score'] if 'conversion_score' in df.columns else repeat(0)
+        
+        # Rows where every serialized column parsed
+        parsed = lambda column: column.map(lambda value: value is not _UNPARSEABLE)
+        valid = parsed(messages) & parsed(lead_info) & parsed(behavioral_data)
+        n_samples = int(valid.sum())
+        
+        skipped = len(df) - n_samples
+        if skipped:
+            logger.warning(f"Skipped {skipped} rows that could not be parsed")
+        
+        if not n_samples:
             logger.warning("No valid training data found")
             return None
         
+        # Convert to training format lazily; train() consumes one row dict
+        # at a time instead of a list of all of them
+        training_data = (
+            {
+                'messages': row_messages,
+                'lead_info': row_lead_info,
+                'behavioral_data': row_behavioral_data,
+                'intent': intent,
+                'conversion_score': score
+            }
+            for row_messages, row_lead_info, row_behavioral_data, intent, score, ok
+            in zip(messages, lead_info, behavioral_data, intents, scores, valid)
+            if ok
+        )
+        
         # Train model
-        results = model.train(training_data)
+        results = model.train(training_data, n_samples=n_samples)
         
-        logger.info(f"Model training completed with {len(training_data)} samples")
+        logger.info(f"Model training completed with {n_samples} samples")
         return results
         
     except Exception as e:
@@ -0,0 +1,46 @@
+"""
+Cache for first-turn LLM replies.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+class ResponseCache:
+    """
+    Remembers replies to opening messages and serves them again when a new
+    conversation opens with the same message (ignoring case and spacing).
+    Matching is on the text, not an embedding: two openers can be close in
+    meaning and still differ in a name or company the reply echoes back.
+    Least recently used entries are dropped past capacity.
+    """
+    
+    def __init__(self, capacity: int = 1024):
+        self.capacity = capacity
+        self._replies: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Cache key for a message: lowercased, whitespace collapsed."""
+        return " ".join(text.lower().split())
+    
+    def lookup(self, key: str) -> Optional[str]:
+        """Returns the cached reply for a normalized message, if there is one."""
+        with self._lock:
+            reply = self._replies.get(key)
+            if reply is not None:
+                self._replies.move_to_end(key)
+            return reply
+    
+    def store(self, key: str, response: str):
+        """Adds a reply, dropping the least recently used one when full."""
+        with self._lock:
+            self._replies[key] = response
+            self._replies.move_to_end(key)
+            while len(self._replies) > self.capacity:
+                self._replies.popitem(last=False)
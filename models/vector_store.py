@@ -3,13 +3,20 @@ Vector store implementation using FAISS for document retrieval.
 """
 
 import os
+import threading
 import pickle
 import json
-from typing import List, Dict, Any, Optional
+import hashlib
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
 
 import numpy as np
 import faiss
+import pyarrow as pa
+import pyarrow.parquet as pq
 from sentence_transformers import SentenceTransformer
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.schema import Document
@@ -19,6 +26,30 @@ from utils.logging import get_logger
 
 logger = get_logger(__name__)
 
+# metadata.json holds one dict per chunk, so on a big corpus the stdlib
+# encoder/decoder is a noticeable part of save/load; orjson reads and writes
+# the same JSON, just faster.
+try:
+    import orjson
+    
+    def _dump_json(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+    
+    _load_json = orjson.loads
+except ImportError:
+    def _dump_json(obj) -> bytes:
+        return json.dumps(obj).encode('utf-8')
+    
+    _load_json = json.loads
+
+# Per-chunk document_type codes; int16 leaves room for far more types than
+# a knowledge base will ever have
+_DOC_TYPE_DTYPE = np.int16
+_MAX_DOC_TYPES = int(np.iinfo(_DOC_TYPE_DTYPE).max) + 1
+
+if model_config.faiss_num_threads > 0:
+    faiss.omp_set_num_threads(model_config.faiss_num_threads)
+
 class VectorStore:
     """FAISS-based vector store for document retrieval."""
     
@@ -33,20 +64,44 @@ class VectorStore:
         # Initialize components
         self.embedding_model = None
         self.index = None
+        # True while self.index is a read-only memory map of the saved file
+        self._index_mapped = False
         self.documents = []
         self.metadata = []
+        # Chunks per document_type, kept in step with self.metadata
+        self._doc_type_counts = Counter()
+        # Small int code per chunk for its document_type (codes assigned in
+        # order of first appearance), so type filters are array ops
+        self._type_codes = {}
+        self._doc_type_ids = np.empty(0, dtype=_DOC_TYPE_DTYPE)
+        # FAISS search params restricting hits to a set of document types,
+        # keyed by frozenset of types; rebuilt whenever the chunks change
+        self._type_params = {}
+        
+        # Repeated queries skip the encoder; embeddings don't depend on the
+        # index contents, so this never needs invalidating
+        self._encode_query = lru_cache(maxsize=model_config.query_embedding_cache_size)(self._encode_query_uncached)
         
         # Create directory if it doesn't exist
         os.makedirs(self.vector_db_path, exist_ok=True)
         
         self._load_or_initialize()
+        
+        # Chunk embeddings by content hash, persisted across runs so
+        # unchanged chunks skip the encoder when the store is rebuilt
+        self._embedding_cache_path = os.path.join(self.vector_db_path, "emb_cache.npz")
+        self._embedding_cache = self._load_embedding_cache()
     
     def _load_or_initialize(self):
         """Load existing index or initialize new one."""
         index_path = os.path.join(self.vector_db_path, "faiss_index")
-        documents_path = os.path.join(self.vector_db_path, "documents.pkl")
+        documents_path = os.path.join(self.vector_db_path, "documents.parquet")
         metadata_path = os.path.join(self.vector_db_path, "metadata.json")
         
+        # Stores saved before the switch to Parquet still load from the pickle
+        if not os.path.exists(documents_path):
+            documents_path = os.path.join(self.vector_db_path, "documents.pkl")
+        
         if os.path.exists(index_path) and os.path.exists(documents_path):
             logger.info("Loading existing vector store...")
             self._load_index(index_path, documents_path, metadata_path)
@@ -57,7 +112,7 @@ class VectorStore:
     def _initialize_index(self):
         """Initialize the FAISS index and embedding model."""
         # Initialize embedding model
-        self.embedding_model = SentenceTransformer(self.embedding_model_name)
+        self.embedding_model = self._load_embedding_model()
         embedding_dim = self.embedding_model.get_sentence_embedding_dimension()
         
         # Initialize FAISS index
@@ -65,22 +120,47 @@ class VectorStore:
         
         logger.info(f"Initialized FAISS index with dimension {embedding_dim}")
     
+    def _load_embedding_model(self) -> SentenceTransformer:
+        """
+        The sentence encoder, on ONNX Runtime with int8 weights when
+        configured; falls back to the PyTorch model if that isn't available.
+        """
+        if model_config.embedding_backend == "onnx":
+            try:
+                model = SentenceTransformer(
+                    self.embedding_model_name,
+                    backend="onnx",
+                    model_kwargs={"file_name": model_config.embedding_onnx_file}
+                )
+                logger.info(f"Loaded ONNX embedding model ({model_config.embedding_onnx_file})")
+                return model
+            except Exception as e:
+                logger.warning(f"ONNX embedding backend unavailable, using PyTorch: {e}")
+        
+        return SentenceTransformer(self.embedding_model_name)
+    
     def _load_index(self, index_path: str, documents_path: str, metadata_path: str):
         """Load existing FAISS index and documents."""
         try:
             # Load FAISS index
-            self.index = faiss.read_index(index_path)
+            self.index = self._read_index(index_path)
+            self._apply_search_params()
             
             # Load documents
-            with open(documents_path, 'rb') as f:
-                self.documents = pickle.load(f)
+            if documents_path.endswith(".parquet"):
+                self.documents = pq.read_table(documents_path).column('text').to_pylist()
+            else:
+                with open(documents_path, 'rb') as f:
+                    self.documents = pickle.load(f)
             
             # Load metadata
-            with open(metadata_path, 'r') as f:
-                self.metadata = json.load(f)
+            with open(metadata_path, 'rb') as f:
+                self.metadata = _load_json(f.read())
+            self._doc_type_counts = Counter(meta.get('document_type', 'general') for meta in self.metadata)
+            self._doc_type_ids = self._encode_doc_types(self.metadata)
             
             # Initialize embedding model
-            self.embedding_model = SentenceTransformer(self.embedding_model_name)
+            self.embedding_model = self._load_embedding_model()
             
             logger.info(f"Loaded vector store with {len(self.documents)} documents")
             
@@ -88,31 +168,55 @@ class VectorStore:
             logger.error(f"Error loading vector store: {e}")
             self._initialize_index()
     
+    def _read_index(self, index_path: str):
+        """
+        Memory-map the saved index read-only, so pages load as searches touch
+        them instead of all up front. Falls back to a normal read for index
+        types FAISS can't map.
+        """
+        try:
+            index = faiss.read_index(index_path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+            self._index_mapped = True
+            return index
+        except RuntimeError as e:
+            logger.debug("Index can't be memory-mapped, reading it in: {}", e)
+            self._index_mapped = False
+            return faiss.read_index(index_path)
+    
     def _save_index(self):
         """Save the FAISS index and documents."""
         try:
             index_path = os.path.join(self.vector_db_path, "faiss_index")
-            documents_path = os.path.join(self.vector_db_path, "documents.pkl")
+            documents_path = os.path.join(self.vector_db_path, "documents.parquet")
             metadata_path = os.path.join(self.vector_db_path, "metadata.json")
             
             # Save FAISS index
             faiss.write_index(self.index, index_path)
             
-            # Save documents
-            with open(documents_path, 'wb') as f:
-                pickle.dump(self.documents, f)
+            # Save documents as one Arrow string column; loading it is a
+            # columnar read rather than unpickling an object graph
+            pq.write_table(pa.table({'text': pa.array(self.documents, type=pa.string())}), documents_path)
             
             # Save metadata
-            with open(metadata_path, 'w') as f:
-                json.dump(self.metadata, f)
+            with open(metadata_path, 'wb') as f:
+                f.write(_dump_json(self.metadata))
+            
+            # Record what the chunks and index were built with, so a settings
+            # change at startup triggers a rebuild instead of reusing them
+            with open(os.path.join(self.vector_db_path, "build.json"), 'wb') as f:
+                f.write(_dump_json(self._build_settings()))
             
             logger.info("Vector store saved successfully")
             
         except Exception as e:
             logger.error(f"Error saving vector store: {e}")
     
-    def add_documents(self, documents: List[Document], document_type: str = "general"):
-        """Add documents to the vector store."""
+    def add_documents(self, documents: List[Document], document_type: str = "general", persist: bool = True):
+        """
+        Add documents to the vector store. Bulk loads pass persist=False
+        and call persist() once at the end instead of rewriting the files
+        after every batch.
+        """
         if not documents:
             logger.warning("No documents provided to add")
             return
@@ -124,37 +228,163 @@ class VectorStore:
             length_function=len,
         )
         
-        chunks = []
-        for doc in documents:
-            doc_chunks = text_splitter.split_documents([doc])
-            chunks.extend(doc_chunks)
+        chunks = text_splitter.split_documents(documents)
         
         # Extract text and metadata
         texts = [chunk.page_content for chunk in chunks]
         metadatas = [chunk.metadata for chunk in chunks]
         
         # Generate embeddings
-        embeddings = self.embedding_model.encode(texts, show_progress_bar=True)
+        embeddings = self._embed_chunks(texts)
         
-        # Add to FAISS index
-        if self.index.ntotal == 0:
-            self.index.add(embeddings.astype('float32'))
-        else:
-            # For incremental updates, we need to rebuild the index
-            # This is a simplified approach - in production, you might want more sophisticated handling
-            existing_embeddings = self.index.reconstruct_n(0, self.index.ntotal)
-            all_embeddings = np.vstack([existing_embeddings, embeddings.astype('float32')])
-            
-            # Rebuild index
-            self.index = faiss.IndexFlatIP(embeddings.shape[1])
-            self.index.add(all_embeddings)
+        # A mapped index is read-only (and backed by the file we're about to
+        # overwrite), so pull it into memory before changing it
+        if self._index_mapped:
+            self.index = faiss.read_index(os.path.join(self.vector_db_path, "faiss_index"))
+            self._apply_search_params()
+            self._index_mapped = False
+        
+        # Add to FAISS index; flat and IVF indexes both append in place
+        self.index.add(np.ascontiguousarray(embeddings, dtype=np.float32))
+        self._maybe_compress_index()
         
         # Update documents and metadata
         self.documents.extend(texts)
         self.metadata.extend(metadatas)
+        self._doc_type_counts.update(meta.get('document_type', 'general') for meta in metadatas)
+        self._doc_type_ids = np.concatenate((self._doc_type_ids, self._encode_doc_types(metadatas)))
+        self._type_params.clear()
         
         logger.info(f"Added {len(chunks)} chunks to vector store")
+        if persist:
+            self.persist()
+    
+    def persist(self):
+        """Write the index, documents and chunk-embedding cache to disk."""
         self._save_index()
+        self._save_embedding_cache()
+    
+    def saved_with_current_settings(self) -> bool:
+        """Whether the saved store was built with the encoder, chunking and index settings configured now."""
+        try:
+            with open(os.path.join(self.vector_db_path, "build.json"), 'rb') as f:
+                return _load_json(f.read()) == self._build_settings()
+        except Exception:
+            return False
+    
+    def _build_settings(self) -> Dict[str, Any]:
+        """Settings that shape the saved chunks and index; changing any means re-embedding."""
+        return {
+            'encoder': self._embedding_cache_owner(),
+            'chunk_size': self.chunk_size,
+            'chunk_overlap': self.chunk_overlap,
+            'vector_index_factory': model_config.vector_index_factory
+        }
+    
+    def saved_mtime(self) -> Optional[float]:
+        """When the index was last written to disk, or None if it never was."""
+        index_path = os.path.join(self.vector_db_path, "faiss_index")
+        return os.path.getmtime(index_path) if os.path.exists(index_path) else None
+    
+    def _embed_chunks(self, texts: List[str]) -> np.ndarray:
+        """Embeddings for chunk texts, running the encoder only on ones it hasn't seen."""
+        if not texts:
+            return np.empty((0, self.index.d), dtype=np.float32)
+        
+        keys = [_chunk_key(text) for text in texts]
+        
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in self._embedding_cache:
+                missing.setdefault(key, text)
+        
+        if missing:
+            # Unit-length vectors make the inner-product index a cosine index
+            encoded = self.embedding_model.encode(
+                list(missing.values()),
+                batch_size=model_config.embedding_batch_size,
+                show_progress_bar=True,
+                convert_to_numpy=True,
+                normalize_embeddings=True
+            )
+            self._embedding_cache.update(zip(missing, np.asarray(encoded, dtype=np.float32)))
+        
+        logger.info(f"Embedded {len(missing)} new chunks, {len(texts) - len(missing)} from cache")
+        return np.stack([self._embedding_cache[key] for key in keys])
+    
+    def _embedding_cache_owner(self) -> str:
+        """Which encoder the cached vectors came from; a different one invalidates them."""
+        return f"{self.embedding_model_name}|{model_config.embedding_backend}"
+    
+    def _load_embedding_cache(self) -> Dict[str, np.ndarray]:
+        """Read the persisted chunk-embedding cache, or start an empty one."""
+        if not os.path.exists(self._embedding_cache_path):
+            return {}
+        try:
+            with np.load(self._embedding_cache_path) as data:
+                if str(data['owner']) != self._embedding_cache_owner():
+                    return {}
+                return dict(zip(data['keys'].tolist(), data['vectors']))
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable embedding cache: {e}")
+            return {}
+    
+    def _save_embedding_cache(self):
+        """
+        Persist the chunk-embedding cache next to the index, keeping only
+        chunks still in the store (the most recent ones, up to the cap) so
+        it doesn't grow with every edit to the knowledge base.
+        """
+        live = dict.fromkeys(_chunk_key(text) for text in self.documents)
+        keys = [key for key in live if key in self._embedding_cache]
+        keys = keys[max(0, len(keys) - model_config.embedding_cache_max_entries):]
+        self._embedding_cache = {key: self._embedding_cache[key] for key in keys}
+        if not keys:
+            return
+        
+        try:
+            np.savez(
+                self._embedding_cache_path,
+                owner=np.array(self._embedding_cache_owner()),
+                keys=np.array(list(self._embedding_cache)),
+                vectors=np.stack(list(self._embedding_cache.values()))
+            )
+        except Exception as e:
+            logger.error(f"Error saving embedding cache: {e}")
+    
+    def _maybe_compress_index(self):
+        """
+        Swap the exact flat index for an IVF-PQ one once there are enough
+        vectors to train it. Queries then probe a few inverted lists of
+        compressed codes instead of scanning every full vector; small
+        knowledge bases stay exact.
+        """
+        if not isinstance(self.index, faiss.IndexFlat) or self.index.ntotal < model_config.vector_ivf_min_vectors:
+            return
+        
+        vectors = self.index.reconstruct_n(0, self.index.ntotal)
+        index = faiss.index_factory(self.index.d, model_config.vector_index_factory, faiss.METRIC_INNER_PRODUCT)
+        index.train(vectors)
+        index.add(vectors)
+        self.index = index
+        self._apply_search_params()
+        
+        logger.info(f"Switched to {model_config.vector_index_factory} index for {index.ntotal} vectors")
+    
+    def _apply_search_params(self):
+        """Set nprobe on IVF indexes; flat indexes have nothing to tune."""
+        ivf = faiss.try_extract_index_ivf(self.index)
+        if ivf is not None:
+            ivf.nprobe = model_config.vector_nprobe
+    
+    def _encode_query_uncached(self, query: str) -> np.ndarray:
+        """(1, d) float32 query embedding, read-only since it's shared through the cache."""
+        # encode() already returns float32; only copy if it somehow didn't
+        embedding = np.ascontiguousarray(
+            self.embedding_model.encode([query], normalize_embeddings=True), dtype=np.float32
+        )
+        embedding.flags.writeable = False
+        return embedding
     
     def similarity_search(self, query: str, k: int = None) -> List[Dict[str, Any]]:
         """Search for similar documents."""
@@ -164,41 +394,110 @@ class VectorStore:
         k = k or self.top_k
         
         # Generate query embedding
-        query_embedding = self.embedding_model.encode([query])
+        query_embedding = self._encode_query(query)
         
         # Search in FAISS index
-        scores, indices = self.index.search(query_embedding.astype('float32'), k)
-        
-        # Return results
-        results = []
-        for i, (score, idx) in enumerate(zip(scores[0], indices[0])):
-            if idx < len(self.documents):
-                results.append({
-                    'content': self.documents[idx],
-                    'metadata': self.metadata[idx] if idx < len(self.metadata) else {},
-                    'score': float(score)
-                })
+        scores, indices = self.index.search(query_embedding, k)
         
-        return results
+        return self._collect_results(scores[0], indices[0])
+    
+    def _collect_results(self, scores: np.ndarray, indices: np.ndarray) -> List[Dict[str, Any]]:
+        """Turn one query's row of FAISS hits into result dicts."""
+        # FAISS pads with -1 when it has fewer than k hits; tolist() gives
+        # plain ints/floats instead of numpy scalars
+        documents, metadata = self.documents, self.metadata
+        n_documents, n_metadata = len(documents), len(metadata)
+        return [
+            {
+                'content': documents[idx],
+                'metadata': metadata[idx] if idx < n_metadata else {},
+                'score': score
+            }
+            for score, idx in zip(scores.tolist(), indices.tolist())
+            if 0 <= idx < n_documents
+        ]
     
     def get_relevant_documents(self, query: str, document_types: List[str] = None) -> List[Dict[str, Any]]:
         """Get relevant documents for a query, optionally filtered by document type."""
-        results = self.similarity_search(query)
-        
-        if document_types:
-            # Filter by document type if specified
-            filtered_results = []
-            for result in results:
-                doc_type = result.get('metadata', {}).get('document_type', 'general')
-                if doc_type in document_types:
-                    filtered_results.append(result)
-            results = filtered_results
+        if not document_types:
+            return self.similarity_search(query)
+        if not query.strip():
+            return []
         
-        return results
+        # Have FAISS skip other types during the search, so all top_k hits
+        # are of a wanted type rather than whatever survives a post-filter
+        try:
+            scores, indices = self.index.search(
+                self._encode_query(query), self.top_k, params=self._type_search_params(document_types)
+            )
+        except (AttributeError, RuntimeError, TypeError) as e:
+            logger.debug("Filtered search unavailable, filtering afterwards: {}", e)
+            return self._filter_by_type(self.similarity_search(query), document_types)
+        
+        return self._collect_results(scores[0], indices[0])
+    
+    def _encode_doc_types(self, metadatas: List[Dict[str, Any]]) -> np.ndarray:
+        """document_type code per chunk, assigning codes to new types."""
+        codes = self._type_codes
+        encoded = [codes.setdefault(meta.get('document_type', 'general'), len(codes)) for meta in metadatas]
+        # Codes must fit the array's dtype, or they'd wrap and mix types up
+        if len(codes) > _MAX_DOC_TYPES:
+            raise ValueError(f"Too many document types ({len(codes)}), at most {_MAX_DOC_TYPES} are supported")
+        return np.fromiter(encoded, dtype=_DOC_TYPE_DTYPE, count=len(encoded))
+    
+    def _type_search_params(self, document_types: List[str]):
+        """SearchParameters whose IDSelector only admits chunks of document_types."""
+        key = frozenset(document_types)
+        cached = self._type_params.get(key)
+        if cached is None:
+            codes = [self._type_codes[t] for t in key if t in self._type_codes]
+            ids = np.flatnonzero(np.isin(self._doc_type_ids, codes)).astype(np.int64)
+            selector = faiss.IDSelectorBatch(len(ids), faiss.swig_ptr(ids))
+            # IVF indexes reject plain SearchParameters and would otherwise
+            # lose the configured nprobe
+            if faiss.try_extract_index_ivf(self.index) is not None:
+                params = faiss.SearchParametersIVF(sel=selector, nprobe=model_config.vector_nprobe)
+            else:
+                params = faiss.SearchParameters(sel=selector)
+            # The params only hold a raw pointer to the selector, so keep
+            # both alive together
+            cached = self._type_params[key] = (selector, params)
+        return cached[1]
     
     def get_product_knowledge(self, query: str) -> str:
         """Get product knowledge relevant to the query."""
-        results = self.get_relevant_documents(query, ['product_docs', 'case_studies'])
+        return self._format_product_knowledge(self.similarity_search(query))
+    
+    def get_case_studies(self, query: str) -> str:
+        """Get relevant case studies."""
+        return self._format_case_studies(self.similarity_search(query))
+    
+    def get_competitor_info(self, query: str) -> str:
+        """Get competitor information."""
+        return self._format_competitor_info(self.similarity_search(query))
+    
+    def get_knowledge_bundle(self, query: str) -> Tuple[str, str, str]:
+        """
+        Product knowledge, case studies and competitor info for one query.
+        All three filter the same top-k hits, so search (and embed) once.
+        """
+        results = self.similarity_search(query)
+        return (
+            self._format_product_knowledge(results),
+            self._format_case_studies(results),
+            self._format_competitor_info(results)
+        )
+    
+    def _filter_by_type(self, results: List[Dict[str, Any]], document_types: List[str]) -> List[Dict[str, Any]]:
+        """Keep only results whose document_type is in document_types."""
+        return [
+            result for result in results
+            if result.get('metadata', {}).get('document_type', 'general') in document_types
+        ]
+    
+    def _format_product_knowledge(self, results: List[Dict[str, Any]]) -> str:
+        """Render search results as product knowledge."""
+        results = self._filter_by_type(results, ['product_docs', 'case_studies'])
         
         if not results:
             return "I don't have specific information about that topic yet."
@@ -214,9 +513,9 @@ class VectorStore:
         
         return "\n\n".join(knowledge_parts)
     
-    def get_case_studies(self, query: str) -> str:
-        """Get relevant case studies."""
-        results = self.get_relevant_documents(query, ['case_studies'])
+    def _format_case_studies(self, results: List[Dict[str, Any]]) -> str:
+        """Render search results as case studies."""
+        results = self._filter_by_type(results, ['case_studies'])
         
         if not results:
             return "I don't have specific case studies for that scenario yet."
@@ -231,9 +530,9 @@ class VectorStore:
         
         return "\n\n".join(case_studies)
     
-    def get_competitor_info(self, query: str) -> str:
-        """Get competitor information."""
-        results = self.get_relevant_documents(query, ['competitor_battlecards'])
+    def _format_competitor_info(self, results: List[Dict[str, Any]]) -> str:
+        """Render search results as competitor comparisons."""
+        results = self._filter_by_type(results, ['competitor_battlecards'])
         
         if not results:
             return "I don't have specific competitor information for that comparison."
@@ -252,10 +551,20 @@ class VectorStore:
         """Clear all documents from the vector store."""
         self.documents = []
         self.metadata = []
-        
-        # Reinitialize index
-        embedding_dim = self.embedding_model.get_sentence_embedding_dimension()
-        self.index = faiss.IndexFlatIP(embedding_dim)
+        self._doc_type_counts.clear()
+        self._type_codes.clear()
+        self._doc_type_ids = np.empty(0, dtype=_DOC_TYPE_DTYPE)
+        self._type_params.clear()
+        
+        # Empty an in-memory flat index in place; a mapped index is read-only
+        # and a compressed one should start over as exact, so those get a
+        # fresh flat index instead
+        if isinstance(self.index, faiss.IndexFlat) and not self._index_mapped:
+            self.index.reset()
+        else:
+            embedding_dim = self.embedding_model.get_sentence_embedding_dimension()
+            self.index = faiss.IndexFlatIP(embedding_dim)
+            self._index_mapped = False
         
         # Save empty state
         self._save_index()
@@ -268,70 +577,114 @@ class VectorStore:
             'total_documents': len(self.documents),
             'index_size': self.index.ntotal if self.index else 0,
             'embedding_dimension': self.embedding_model.get_sentence_embedding_dimension() if self.embedding_model else 0,
-            'document_types': list(set([meta.get('document_type', 'general') for meta in self.metadata]))
+            'document_types': list(self._doc_type_counts)
         }
 
 
+def _chunk_key(text: str) -> str:
+    """Content hash a chunk's cached embedding is stored under."""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
 # Global vector store instance
 _vector_store = None
+_vector_store_lock = threading.Lock()
 
 def get_vector_store() -> VectorStore:
     """Get the global vector store instance."""
     global _vector_store
     if _vector_store is None:
-        _vector_store = VectorStore()
+        # Only build it once even if first uses race
+        with _vector_store_lock:
+            if _vector_store is None:
+                _vector_store = VectorStore()
     return _vector_store
 
 def initialize_vector_store_from_files(data_dir: str):
     """Initialize vector store with documents from the data directory."""
     vector_store = get_vector_store()
     
-    # Clear existing documents
-    vector_store.clear()
-    
     # Load documents from different directories
     document_types = {
-        'product_docs': 'data/product_docs',
-        'case_studies': 'data/case_studies', 
-        'competitor_battlecards': 'data/competitor_battlecards'
+        'product_docs': os.path.join(data_dir, 'product_docs'),
+        'case_studies': os.path.join(data_dir, 'case_studies'),
+        'competitor_battlecards': os.path.join(data_dir, 'competitor_battlecards')
     }
     
+    # The store already loaded what was saved last time; only re-embed the
+    # knowledge base if a file changed since then, or the encoder, chunking
+    # or index settings did
+    saved_at = vector_store.saved_mtime()
+    if (
+        vector_store.documents
+        and saved_at is not None
+        and vector_store.saved_with_current_settings()
+        and _newest_source_mtime(document_types.values()) <= saved_at
+    ):
+        logger.info(f"Vector store is up to date ({len(vector_store.documents)} chunks), skipping rebuild")
+        return
+    
+    # Clear existing documents
+    vector_store.clear()
+    
     for doc_type, dir_path in document_types.items():
         if os.path.exists(dir_path):
             documents = load_documents_from_directory(dir_path, doc_type)
             if documents:
-                vector_store.add_documents(documents, doc_type)
+                vector_store.add_documents(documents, doc_type, persist=False)
                 logger.info(f"Loaded {len(documents)} {doc_type} documents")
     
+    # Write the index and embedding cache once for the whole load
+    vector_store.persist()
     logger.info("Vector store initialization complete")
 
+def _newest_source_mtime(directories) -> float:
+    """Latest modification time across the knowledge base directories and their files."""
+    newest = 0.0
+    for directory in directories:
+        if not os.path.isdir(directory):
+            continue
+        # A directory's own mtime moves when files are added, removed or renamed
+        newest = max(newest, os.path.getmtime(directory))
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    newest = max(newest, entry.stat().st_mtime)
+    return newest
+
 def load_documents_from_directory(directory: str, document_type: str) -> List[Document]:
     """Load documents from a directory."""
-    documents = []
-    
     if not os.path.exists(directory):
-        return documents
+        return []
     
-    for filename in os.listdir(directory):
-        file_path = os.path.join(directory, filename)
-        
-        if os.path.isfile(file_path):
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                # Create document with metadata
-                doc = Document(
-                    page_content=content,
-                    metadata={
-                        'source': filename,
-                        'document_type': document_type,
-                        'file_path': file_path
-                    }
-                )
-                documents.append(doc)
-                
-            except Exception as e:
-                logger.error(f"Error loading document {file_path}: {e}")
+    file_paths = [
+        os.path.join(directory, filename) for filename in os.listdir(directory)
+        if os.path.isfile(os.path.join(directory, filename))
+    ]
+    if not file_paths:
+        return []
     
-    return documents
+    # Reads are IO-bound, so overlap them on a thread pool; map keeps the
+    # directory order
+    with ThreadPoolExecutor(max_workers=min(32, len(file_paths))) as executor:
+        loaded = executor.map(lambda path: _read_document(path, document_type), file_paths)
+        return [doc for doc in loaded if doc is not None]
+
+def _read_document(file_path: str, document_type: str) -> Optional[Document]:
+    """Read one file as a Document, or None if it can't be read."""
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        
+        # Create document with metadata
+        return Document(
+            page_content=content,
+            metadata={
+                'source': os.path.basename(file_path),
+                'document_type': document_type,
+                'file_path': file_path
+            }
+        )
+        
+    except Exception as e:
+        logger.error(f"Error loading document {file_path}: {e}")
+        return None
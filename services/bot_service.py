@@ -1,10 +1,14 @@
 import os
-import json
+import threading
 import uuid
-from typing import Dict, List, Any
+from collections import deque
+from functools import lru_cache
+from typing import Dict, List, Any, Iterator
+
+from cachetools import TTLCache
 
 # Local stuff
-from config.settings import app_config, validate_config
+from config.settings import app_config, conversation_config, validate_config
 from models.llm_pipeline import get_llm_pipeline
 from models.vector_store import initialize_vector_store_from_files
 from models.predictive_model import train_model_from_data
@@ -13,6 +17,52 @@ from utils.logging import get_logger
 
 logger = get_logger(__name__)
 
+_NL = "\n"
+
+_TRAINING_DATA_PATH = os.path.join(app_config.data_dir, "training_data", "crm_data.csv")
+
+_WARMING_UP_MSG = "I'm still warming up - give me a few seconds and try again."
+
+# The sidebar is rendered section by section; each section is cached on
+# its own inputs so a turn that only moves the score rebuilds just that part.
+
+@lru_cache(maxsize=512)
+def _render_profile(name: Any, role: Any, company: Any) -> str:
+    return f"""
+## 👤 Lead Profile
+**Name:** {name}
+**Role:** {role}
+**Company:** {company}
+"""
+
+@lru_cache(maxsize=512)
+def _render_qualification(intent: Any, score: Any, action: Any) -> str:
+    return f"""
+## 🎯 Qualification
+**Intent:** `{intent}`
+**Score:** **{score}/100**
+**Next Step:** {action}
+"""
+
+@lru_cache(maxsize=512)
+def _render_signals(signals: tuple) -> str:
+    return f"""
+## 🔍 Signals
+{_NL.join([f"• {s}" for s in signals])}
+"""
+
+@lru_cache(maxsize=512)
+def _render_tags(tags: tuple) -> str:
+    return f"""
+## 🏷️ Tags
+{', '.join([f"`{t}`" for t in tags])}
+"""
+
+_SIDEBAR_FOOTER = """
+---
+*Analysis based on conversation context*
+"""
+
 class LeadBot:
     """
     Core bot logic for handling lead conversations and qualification.
@@ -21,11 +71,21 @@ class LeadBot:
     def __init__(self):
         self.llm = get_llm_pipeline()
         self.crm = get_crm_client()
-        # In-memory store for active chats. 
+        # In-memory store for active chats, bounded so abandoned sessions
+        # get evicted instead of piling up.
         # TODO: Move to Redis for production.
-        self.active_chats = {}
+        self.active_chats = TTLCache(
+            maxsize=conversation_config.max_active_conversations,
+            ttl=conversation_config.conversation_timeout_minutes * 60
+        )
+        # TTLCache isn't thread-safe (even get() can evict), and Gradio runs
+        # handlers on several worker threads
+        self._chats_lock = threading.Lock()
         
-        self._setup()
+        # Knowledge base + scorer training run in the background so the UI
+        # can come up right away; chat replies wait on this flag.
+        self._ready = threading.Event()
+        threading.Thread(target=self._setup, name="leadbot-setup", daemon=True).start()
     
     def _setup(self):
         """Boot up the necessary components."""
@@ -38,15 +98,16 @@ class LeadBot:
             initialize_vector_store_from_files(app_config.data_dir)
             
             # If we have ground truth data, train the scorer
-            training_path = os.path.join(app_config.data_dir, "training_data", "crm_data.csv")
-            if os.path.exists(training_path):
+            if os.path.exists(_TRAINING_DATA_PATH):
                 logger.info("Retraining model on startup...")
-                train_model_from_data(training_path)
+                train_model_from_data(_TRAINING_DATA_PATH)
             
             logger.info("LeadBot ready to roll")
             
         except Exception as e:
             logger.error(f"Failed to startup: {e}")
+        finally:
+            self._ready.set()
     
     def start_chat(self) -> tuple:
         """Kicks off a new session."""
@@ -55,42 +116,51 @@ class LeadBot:
         # Get the opening line from the LLM
         greeting = self.llm.start_conversation(chat_id)
         
-        self.active_chats[chat_id] = {
-            'history': [],
+        with self._chats_lock:
+            self.active_chats[chat_id] = self._new_chat_entry()
+        return greeting, chat_id
+    
+    @staticmethod
+    def _new_chat_entry() -> Dict[str, Any]:
+        """Fresh per-session state for active_chats."""
+        return {
+            'history': deque(maxlen=conversation_config.max_conversation_length),
             'lead_data': None
         }
-        return greeting, chat_id
+    
+    def _lead_data(self, chat_id: str) -> Any:
+        """Latest structured output for a session, or None."""
+        with self._chats_lock:
+            chat = self.active_chats.get(chat_id)
+            return chat['lead_data'] if chat is not None else None
     
     def chat(self, msg: str, chat_id: str, history: List[List[str]]) -> tuple:
         """
         Main chat handler.
         Takes the user message, runs it through the pipeline, updates state.
         """
+        rejection = self._check_input(msg)
+        if rejection:
+            return history, chat_id, rejection
+        
         # If the frontend sends a bad ID, just restart
         if not chat_id or chat_id == "None":
             greeting, chat_id = self.start_chat()
             history = [[greeting, None]]
         
+        if not self._ready.is_set():
+            history.append([msg, _WARMING_UP_MSG])
+            return history, chat_id, "Warming up..."
+        
         try:
             # Getting response and extracted data
             # This is where the magic happens
             result = self.llm.process_message(chat_id, msg)
             
-            # Save state
-            if chat_id in self.active_chats:
-                self.active_chats[chat_id]['history'].append({
-                    'user': msg,
-                    'bot': result['response']
-                })
-                self.active_chats[chat_id]['lead_data'] = result['structured_output']
-            
             # Update UI history
             history.append([msg, result['response']])
             
-            # Format the sidebar data
-            sidebar_content = self._format_sidebar(result['structured_output'])
-            
-            return history, chat_id, sidebar_content
+            return history, chat_id, self._record_turn(chat_id, msg, result)
             
         except Exception as e:
             logger.error(f"Chat error: {e}")
@@ -98,40 +168,92 @@ class LeadBot:
             history.append([msg, err_msg])
             return history, chat_id, "System Error"
     
+    def stream_chat(self, msg: str, chat_id: str, history: List[List[str]]) -> Iterator[tuple]:
+        """
+        Streaming version of chat() for the UI.
+        Yields (history, chat_id, sidebar) as the reply grows. The sidebar is
+        only re-rendered once the turn is done, the partial frames keep
+        showing the previous analysis.
+        """
+        rejection = self._check_input(msg)
+        if rejection:
+            yield history, chat_id, rejection
+            return
+        
+        if not chat_id or chat_id == "None":
+            greeting, chat_id = self.start_chat()
+            history = [[greeting, None]]
+        
+        if not self._ready.is_set():
+            history.append([msg, _WARMING_UP_MSG])
+            yield history, chat_id, "Warming up..."
+            return
+        
+        sidebar_content = self._format_sidebar(self._lead_data(chat_id))
+        
+        history.append([msg, ""])
+        
+        try:
+            for result in self.llm.stream_message(chat_id, msg):
+                history[-1][1] = result['response']
+                
+                if result['structured_output'] is not None:
+                    sidebar_content = self._record_turn(chat_id, msg, result)
+                
+                yield history, chat_id, sidebar_content
+                
+        except Exception as e:
+            logger.error(f"Chat error: {e}")
+            history[-1][1] = "My brain just glitchd. Can you say that again?"
+            yield history, chat_id, "System Error"
+    
+    def _check_input(self, msg: str) -> str:
+        """Returns why a message shouldn't reach the LLM, or '' if it's fine."""
+        if not msg or not msg.strip():
+            return "Please enter a message."
+        if len(msg) > conversation_config.max_input_length:
+            return f"Message too long (max {conversation_config.max_input_length} characters)."
+        return ""
+    
+    def _record_turn(self, chat_id: str, msg: str, result: Dict[str, Any]) -> str:
+        """Saves a finished turn and returns the refreshed sidebar."""
+        with self._chats_lock:
+            # A session that expired while the pipeline still had the
+            # conversation just starts over here, so it can still be synced
+            chat = self.active_chats.get(chat_id)
+            if chat is None:
+                chat = self._new_chat_entry()
+            chat['history'].append({
+                'user': msg,
+                'bot': result['response']
+            })
+            chat['lead_data'] = result['structured_output']
+            # Re-insert so the session's TTL restarts on every turn
+            self.active_chats[chat_id] = chat
+        
+        # Format the sidebar data
+        return self._format_sidebar(result['structured_output'])
+    
     def _format_sidebar(self, data: Dict[str, Any]) -> str:
         """Makes the extracted data look pretty for the sidebar."""
         if not data:
             return "No data collected yet."
         
         try:
-            # Pretty print JSON for the nerdy folks
-            # json_dump = json.dumps(data, indent=2)
-            
             lead = data.get('lead', {})
-            intent = data.get('intent', 'unknown')
-            score = data.get('score', 0)
             
             # Quick summary view
-            return f"""
-## 👤 Lead Profile
-**Name:** {lead.get('name', '-')}
-**Role:** {lead.get('role', '-')}
-**Company:** {lead.get('company', '-')}
-
-## 🎯 Qualification
-**Intent:** `{intent}`
-**Score:** **{score}/100**
-**Next Step:** {data.get('recommended_action', '-')}
-
-## 🔍 Signals
-{chr(10).join([f"• {s}" for s in data.get('top_signals', [])])}
-
-## 🏷️ Tags
-{', '.join([f"`{t}`" for t in data.get('crm_tags', [])])}
-
----
-*Analysis based on conversation context*
-"""
+            return "".join((
+                _render_profile(lead.get('name', '-'), lead.get('role', '-'), lead.get('company', '-')),
+                _render_qualification(
+                    data.get('intent', 'unknown'),
+                    data.get('score', 0),
+                    data.get('recommended_action', '-')
+                ),
+                _render_signals(tuple(data.get('top_signals', []))),
+                _render_tags(tuple(data.get('crm_tags', []))),
+                _SIDEBAR_FOOTER
+            ))
             
         except Exception as e:
             logger.error(f"Sidebar formatting failed: {e}")
@@ -139,11 +261,11 @@ class LeadBot:
     
     def sync_to_crm(self, chat_id: str) -> str:
         """Pushes the lead data to connected CRMs."""
-        if not chat_id or chat_id not in self.active_chats:
+        if not chat_id:
             return "No active session to sync."
         
         try:
-            data = self.active_chats[chat_id]['lead_data']
+            data = self._lead_data(chat_id)
             if not data:
                 return "Nothing to sync yet."
             
@@ -179,7 +301,7 @@ class LeadBot:
     
     def get_summary(self, chat_id: str) -> str:
         """Debug helper to see what the bot 'knows'."""
-        if not chat_id or chat_id not in self.active_chats:
+        if not chat_id:
             return "No active session."
         
         summary = self.llm.get_conversation_summary(chat_id)
@@ -193,3 +315,14 @@ class LeadBot:
 **Msgs:** {summary.get('message_count')}
 **Fields Found:** {', '.join(summary.get('collected_fields', []))}
 """
+
+
+# One bot per process - it owns the LLM, so building two doubles RAM/VRAM
+_bot_instance = None
+
+def get_bot() -> LeadBot:
+    """Gets the shared LeadBot instance."""
+    global _bot_instance
+    if _bot_instance is None:
+        _bot_instance = LeadBot()
+    return _bot_instance
@@ -6,6 +6,11 @@ Quick test suite to make sure everything works.
 import json
 import sys
 import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
@@ -13,7 +18,8 @@ from models.llm_pipeline import get_llm_pipeline
 from models.vector_store import get_vector_store
 from models.predictive_model import get_predictive_model
 from integrations.manager import get_crm_client
-from config.settings import validate_config
+from integrations.hubspot import HubSpotIntegration
+from config.settings import crm_config, validate_config
 
 def check_config():
     """Make sure config is valid."""
@@ -34,9 +40,14 @@ def check_vector_db():
         store = get_vector_store()
         stats = store.get_stats()
         print(f"✅ Vector DB loaded with {stats['total_documents']} docs")
+        
+        results = store.get_relevant_documents("pricing for enterprise teams", ['case_studies'])
+        assert all(r['metadata'].get('document_type') == 'case_studies' for r in results), \
+            "type filter let other types through"
+        print(f"✅ Type filter returned {len(results)} case studies")
         return True
     except Exception as e:
-        print(f"❌ Vector DB test failed: {e}")
+        print(f"❌ Vector DB test failed: {e!r}")
         return False
 
 def check_scorer():
@@ -70,9 +81,17 @@ def check_scorer():
         
         result = model.predict(test_data)
         print(f"✅ Scorer works - Score: {result['score']}, Intent: {result['intent']}")
+        
+        # The vectorized batch path has to agree with one-at-a-time scoring
+        rows = [test_data, {'messages': [], 'lead_info': {}, 'behavioral_data': {}}]
+        batched = model.predict_batch(rows)
+        single = [model.predict(row) for row in rows]
+        assert [(p['score'], p['intent']) for p in batched] == [(p['score'], p['intent']) for p in single], \
+            "predict_batch disagrees with predict"
+        print("✅ Batch scoring matches single scoring")
         return True
     except Exception as e:
-        print(f"❌ Scorer test failed: {e}")
+        print(f"❌ Scorer test failed: {e!r}")
         return False
 
 def check_crm():
@@ -101,6 +120,125 @@ def check_crm():
         print(f"❌ CRM test failed: {e}")
         return False
 
+def check_crm_resilience():
+    """Test CRM timeouts, 429 retries and the circuit breaker."""
+    print("\n🛡️ Testing CRM retries and circuit breaker...")
+    
+    try:
+        hubspot = HubSpotIntegration()
+        
+        # Throttled POSTs were never processed, so they're safe to resend;
+        # a POST that hit a 5xx may have been, so it isn't
+        retry = hubspot.session.get_adapter(hubspot.base_url).max_retries
+        assert retry.is_retry("POST", 429), "429 on POST not retried"
+        assert not retry.is_retry("POST", 503), "5xx on POST retried"
+        assert retry.is_retry("GET", 503), "5xx on GET not retried"
+        
+        class DownSession:
+            """Stands in for a CRM that refuses every connection."""
+            
+            def __init__(self):
+                self.calls = []
+            
+            def request(self, method, url, **kwargs):
+                self.calls.append(kwargs.get("timeout"))
+                raise requests.ConnectionError("connection refused")
+        
+        hubspot.mock_mode = False
+        down = hubspot.session = DownSession()
+        lead = {'name': 'Breaker Test', 'email': 'breaker@example.com'}
+        
+        for _ in range(crm_config.circuit_fail_max):
+            assert not hubspot.create_lead(lead)["success"], "failed call reported as success"
+        expected_timeout = (crm_config.http_connect_timeout, crm_config.http_read_timeout)
+        assert all(t == expected_timeout for t in down.calls), "call sent without the timeout"
+        
+        result = hubspot.create_lead(lead)
+        assert not result["success"], "call through an open breaker reported as success"
+        assert len(down.calls) == crm_config.circuit_fail_max, "breaker didn't stop calls"
+        
+        print("✅ Timeouts set, throttled calls retried, breaker opens")
+        return True
+    except Exception as e:
+        print(f"❌ CRM resilience test failed: {e!r}")
+        return False
+
+def check_create_response():
+    """Test that a created record's id is read from the top level of the response."""
+    print("\n🆔 Testing CRM create-response parsing...")
+    
+    try:
+        class CreatedResponse:
+            status_code = 201
+            content = b'{"properties": {"id": "nested"}, "id": "42"}'
+            
+            def raise_for_status(self):
+                pass
+        
+        class CreatedSession:
+            def request(self, method, url, **kwargs):
+                return CreatedResponse()
+        
+        hubspot = HubSpotIntegration()
+        hubspot.mock_mode = False
+        hubspot.session = CreatedSession()
+        
+        result = hubspot.create_lead({'name': 'Parse Test', 'email': 'parse@example.com'})
+        assert result["lead_id"] == "42", f"picked the wrong id: {result['lead_id']!r}"
+        
+        print("✅ Created id read from the response")
+        return True
+    except Exception as e:
+        print(f"❌ Create response test failed: {e!r}")
+        return False
+
+def check_lead_cache():
+    """Test that repeat syncs are cached but changed leads still go out."""
+    print("\n🗂️ Testing CRM lead cache...")
+    
+    if not crm_config.mock_mode:
+        print("⏭️  Skipped - needs mock mode so nothing hits a real CRM")
+        return True
+    
+    try:
+        crm = get_crm_client()
+        lead = {
+            'name': 'Cache Test',
+            'email': f"cache-{uuid.uuid4().hex}@example.com",
+            'intent': 'researching',
+            'score': 40
+        }
+        
+        first = crm.sync_leads(lead)
+        assert crm.sync_leads(dict(lead)) is first, "identical resync not served from cache"
+        assert crm.sync_leads({**lead, 'score': 90}) is not first, "changed score got the stale result"
+        
+        print("✅ Identical syncs cached, changed ones sent")
+        return True
+    except Exception as e:
+        print(f"❌ Lead cache test failed: {e!r}")
+        return False
+
+def check_vector_caches():
+    """Test the vector store's chunk and query embedding caches."""
+    print("\n🧮 Testing vector store caches...")
+    
+    try:
+        store = get_vector_store()
+        
+        text = f"Embedding cache smoke test {uuid.uuid4().hex}"
+        first = store._embed_chunks([text])
+        again = store._embed_chunks([text, text])
+        assert np.allclose(first[0], again[0]) and np.allclose(again[0], again[1]), "cached embedding differs"
+        
+        assert store._encode_query("pricing") is store._encode_query("pricing"), "query embedding not cached"
+        
+        print("✅ Chunk and query embeddings cached")
+        return True
+    except Exception as e:
+        print(f"❌ Vector cache test failed: {e!r}")
+        return False
+
 def check_conversation():
     """Test the conversation flow."""
     print("\n💬 Testing conversation...")
@@ -132,23 +270,37 @@ def run_all_tests():
     """Run the full test suite."""
     print("🚀 Running AI Lead Bot Tests\n")
     
-    tests = [
+    # These each load a different component, so they run side by side.
+    # The rest go after, one at a time: they reuse the CRM client, vector
+    # store and scorer the others just built, and the getters aren't safe
+    # to race on first use.
+    parallel_tests = [
         ("Config", check_config),
         ("Vector DB", check_vector_db),
         ("Scorer", check_scorer),
         ("CRM", check_crm),
+        ("CRM resilience", check_crm_resilience),
+        ("Create response", check_create_response)
+    ]
+    serial_tests = [
+        ("Lead cache", check_lead_cache),
+        ("Vector caches", check_vector_caches),
         ("Conversation", check_conversation)
     ]
     
-    passed = 0
-    total = len(tests)
+    total = len(parallel_tests) + len(serial_tests)
     
-    for name, test_fn in tests:
+    def run_check(name, test_fn):
         try:
-            if test_fn():
-                passed += 1
+            return test_fn()
         except Exception as e:
             print(f"❌ {name} crashed: {e}")
+            return False
+    
+    with ThreadPoolExecutor(max_workers=len(parallel_tests)) as pool:
+        outcomes = list(pool.map(lambda test: run_check(*test), parallel_tests))
+    outcomes.extend(run_check(name, test_fn) for name, test_fn in serial_tests)
+    passed = sum(1 for ok in outcomes if ok)
     
     print(f"\n📈 Results: {passed}/{total} passed")
     
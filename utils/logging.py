@@ -4,13 +4,17 @@ Logging utilities for the AI Lead Qualification Bot.
 
 import os
 import sys
+from functools import lru_cache
 from typing import Optional
 from loguru import logger
 
-from config.settings import logging_config
+from config.settings import ensure_dir, logging_config
 
 def setup_logging():
-    """Setup logging configuration."""
+    """
+    Setup logging configuration. Sinks are enqueued, so a log call only
+    puts the record on a queue and a background thread does the writing.
+    """
     # Remove default handler
     logger.remove()
     
@@ -20,13 +24,18 @@ def setup_logging():
             sys.stdout,
             format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
             level=logging_config.log_level,
-            colorize=True
+            # Only emit ANSI colours when stdout is a terminal; piped into
+            # a log collector they're just extra bytes to write and strip
+            colorize=None,
+            enqueue=True,
+            backtrace=False,
+            diagnose=False
         )
     
     # Add file handler
     if logging_config.enable_file_logging:
         # Ensure log directory exists
-        os.makedirs(os.path.dirname(logging_config.log_file), exist_ok=True)
+        ensure_dir(os.path.dirname(logging_config.log_file))
         
         logger.add(
             logging_config.log_file,
@@ -34,22 +43,30 @@ def setup_logging():
             level=logging_config.log_level,
             rotation="10 MB",
             retention="30 days",
-            compression="zip"
+            compression="zip",
+            enqueue=True,
+            # Skip walking and dumping frame locals into the log file
+            backtrace=False,
+            diagnose=False
         )
     
     logger.info("Logging setup completed")
 
+# Loguru formats "{}" arguments only after the level check passes, so hot
+# paths should pass values as arguments instead of pre-building f-strings:
+#     logger.info("Created contact: {}", contact_id)
+@lru_cache(maxsize=256)
 def get_logger(name: str):
-    """Get a logger instance for a specific module."""
+    """Get a logger instance for a specific module (one bound logger per name)."""
     return logger.bind(name=name)
 
 def log_function_call(func):
     """Decorator to log function calls."""
     def wrapper(*args, **kwargs):
-        logger.debug(f"Calling {func.__name__} with args={args}, kwargs={kwargs}")
+        logger.debug("Calling {} with args={}, kwargs={}", func.__name__, args, kwargs)
         try:
             result = func(*args, **kwargs)
-            logger.debug(f"{func.__name__} returned {result}")
+            logger.debug("{} returned {}", func.__name__, result)
             return result
         except Exception as e:
             logger.error(f"Error in {func.__name__}: {e}")
@@ -63,14 +80,14 @@ def log_performance(func):
     
     @wraps(func)
     def wrapper(*args, **kwargs):
-        start_time = time.time()
+        start_time = time.perf_counter()
         try:
             result = func(*args, **kwargs)
-            end_time = time.time()
+            end_time = time.perf_counter()
             logger.info(f"{func.__name__} took {end_time - start_time:.3f} seconds")
             return result
         except Exception as e:
-            end_time = time.time()
+            end_time = time.perf_counter()
             logger.error(f"{func.__name__} failed after {end_time - start_time:.3f} seconds: {e}")
             raise
     return wrapper
@@ -84,24 +101,24 @@ class ConversationLogger:
     
     def log_message(self, role: str, content: str, metadata: Optional[dict] = None):
         """Log a conversation message."""
-        self.logger.info(f"Message [{role}]: {content[:100]}{'...' if len(content) > 100 else ''}")
+        self.logger.info("Message [{}]: {}", role, content[:100] + ('...' if len(content) > 100 else ''))
         if metadata:
-            self.logger.debug(f"Message metadata: {metadata}")
+            self.logger.debug("Message metadata: {}", metadata)
     
     def log_prediction(self, prediction: dict):
         """Log a prediction result."""
-        self.logger.info(f"Prediction: intent={prediction.get('intent')}, score={prediction.get('score')}")
-        self.logger.debug(f"Full prediction: {prediction}")
+        self.logger.info("Prediction: intent={}, score={}", prediction.get('intent'), prediction.get('score'))
+        self.logger.debug("Full prediction: {}", prediction)
     
     def log_error(self, error: str, context: Optional[dict] = None):
         """Log an error in the conversation."""
         self.logger.error(f"Conversation error: {error}")
         if context:
-            self.logger.debug(f"Error context: {context}")
+            self.logger.debug("Error context: {}", context)
     
     def log_conversation_end(self, summary: dict):
         """Log conversation end with summary."""
-        self.logger.info(f"Conversation ended: {summary}")
+        self.logger.info("Conversation ended: {}", summary)
 
 # Initialize logging on module import
 setup_logging()